@@ -4,26 +4,43 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Snapshot the environment once so settings are plain dict reads
+_ENV = {**os.environ}
+
 class Config:
     """Application configuration settings"""
     # Flask settings
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
-    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
-    PORT = int(os.getenv('PORT', 5000))
+    SECRET_KEY = _ENV.get('SECRET_KEY', 'dev-key-change-in-production')
+    DEBUG = _ENV.get('DEBUG', 'False').lower() == 'true'
+    PORT = int(_ENV.get('PORT', 5000))
     
     # Database settings for account management
-    DATABASE_PATH = os.getenv('DATABASE_PATH', 'accounts.db')
+    DATABASE_PATH = _ENV.get('DATABASE_PATH', 'accounts.db')
     
     # Legacy EasyPost settings (for backward compatibility)
-    EASYPOST_API_KEY = os.getenv('EASYPOST_API_KEY')
+    EASYPOST_API_KEY = _ENV.get('EASYPOST_API_KEY')
+    # Webhook signing secret for the legacy endpoint; accounts carry their own
+    EASYPOST_WEBHOOK_SECRET = _ENV.get('EASYPOST_WEBHOOK_SECRET')
+    
+    # Largest label download accepted, in bytes
+    MAX_LABEL_SIZE = int(_ENV.get('MAX_LABEL_SIZE', 10 * 1024 * 1024))
     
     # PrintNode settings
-    PRINTNODE_API_KEY = os.getenv('PRINTNODE_API_KEY')
-    PRINTNODE_PRINTER_ID = os.getenv('PRINTNODE_PRINTER_ID')
+    PRINTNODE_API_KEY = _ENV.get('PRINTNODE_API_KEY')
+    PRINTNODE_PRINTER_ID = _ENV.get('PRINTNODE_PRINTER_ID')
+    # Seconds to wait for more labels bound for the same printer before
+    # submitting them as one job. Every batchable label waits this long, even
+    # when nothing arrives to share its job, so batching trades single-label
+    # latency for fewer PrintNode requests during bursts; 0 (the default)
+    # submits each label immediately
+    PRINT_BATCH_WINDOW = float(_ENV.get('PRINT_BATCH_WINDOW', 0))
+    # Seconds a label waits for earlier jobs to the same printer to be sent
+    # before it gives up and is reported as a failed print
+    PRINTER_WAIT_TIMEOUT = float(_ENV.get('PRINTER_WAIT_TIMEOUT', 30))
     
     # Management API settings
-    MANAGEMENT_API_KEY = os.getenv('MANAGEMENT_API_KEY', 'change-this-secure-key')
-    RASPBERRY_PI_URL = os.getenv('RASPBERRY_PI_URL', 'http://raspberrypi.local:5000')
+    MANAGEMENT_API_KEY = _ENV.get('MANAGEMENT_API_KEY', 'change-this-secure-key')
+    RASPBERRY_PI_URL = _ENV.get('RASPBERRY_PI_URL', 'http://raspberrypi.local:5000')
     
     # Logging
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
\ No newline at end of file
+    LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
\ No newline at end of file
@@ -0,0 +1,254 @@
+import struct
+
+# PDF page size for a 4x6 inch label (in points: 1 inch = 72 points)
+LABEL_WIDTH = 4 * 72  # 288 points
+LABEL_HEIGHT = 6 * 72  # 432 points
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+
+# PNG colour types that map straight onto a PDF colour space
+PNG_COLOR_SPACES = {
+    0: ('/DeviceGray', 1),  # Greyscale
+    2: ('/DeviceRGB', 3),   # Truecolour
+    3: (None, 1),           # Indexed-colour, colour space built from PLTE
+}
+
+def parse_png(content):
+    """
+    Read the header chunks of a PNG without decoding any pixel data
+
+    Args:
+        content (bytes): Raw PNG file content
+
+    Returns:
+        dict: IHDR fields plus 'palette', 'has_transparency' and the
+              concatenated zlib stream in 'idat', or None if not a PNG
+    """
+    if content[:8] != PNG_SIGNATURE:
+        return None
+
+    info = {'palette': None, 'has_transparency': False}
+    idat_chunks = []
+    offset = 8
+
+    while offset + 8 <= len(content):
+        length, chunk_type = struct.unpack_from('>I4s', content, offset)
+        data_start = offset + 8
+        data_end = data_start + length
+
+        if chunk_type == b'IHDR':
+            (info['width'], info['height'], info['bit_depth'], info['color_type'],
+             info['compression'], info['filter'], info['interlace']) = struct.unpack_from(
+                '>IIBBBBB', content, data_start
+            )
+        elif chunk_type == b'PLTE':
+            info['palette'] = bytes(content[data_start:data_end])
+        elif chunk_type == b'tRNS':
+            info['has_transparency'] = True
+        elif chunk_type == b'IDAT':
+            idat_chunks.append(content[data_start:data_end])
+        elif chunk_type == b'IEND':
+            break
+
+        # Skip chunk data and the trailing CRC
+        offset = data_end + 4
+
+    if 'width' not in info or not idat_chunks:
+        return None
+
+    info['idat'] = b''.join(idat_chunks)
+    return info
+
+# JPEG component counts that map straight onto a PDF colour space
+JPEG_COLOR_SPACES = {
+    1: '/DeviceGray',
+    3: '/DeviceRGB',
+}
+
+# Start-of-frame markers (baseline, extended, progressive, lossless...);
+# 0xC4, 0xC8 and 0xCC share the range but are not frames
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+def png_to_pdf(content):
+    """
+    Wrap a PNG in a 4x6 PDF by copying its IDAT stream verbatim
+
+    PDF's FlateDecode filter with PNG predictors understands the same
+    compressed scanlines a PNG stores, so no decode/re-encode is needed.
+    Only non-interlaced greyscale, truecolour and indexed PNGs without
+    transparency can be embedded this way.
+
+    Args:
+        content (bytes): Raw PNG file content
+
+    Returns:
+        bytearray: PDF file content, or None if the PNG can't be embedded directly
+    """
+    info = parse_png(content)
+    if not info:
+        return None
+
+    if info['interlace'] != 0 or info['color_type'] not in PNG_COLOR_SPACES:
+        return None
+    if info['bit_depth'] > 8 or info['has_transparency']:
+        return None
+
+    color_space, colors = PNG_COLOR_SPACES[info['color_type']]
+    if color_space is None:
+        palette = info['palette']
+        if not palette:
+            return None
+        color_space = f"[/Indexed /DeviceRGB {len(palette) // 3 - 1} <{palette.hex()}>]"
+
+    image_dict = (
+        f"/Type /XObject /Subtype /Image /Width {info['width']} /Height {info['height']} "
+        f"/ColorSpace {color_space} /BitsPerComponent {info['bit_depth']} "
+        f"/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors {colors} "
+        f"/BitsPerComponent {info['bit_depth']} /Columns {info['width']} >>"
+    )
+
+    return build_image_pdf(image_dict, info['idat'], info['width'], info['height'])
+
+def parse_jpeg(content):
+    """
+    Read the frame header of a JPEG without decoding any pixel data
+
+    Args:
+        content (bytes): Raw JPEG file content
+
+    Returns:
+        dict: 'width', 'height', 'bit_depth' and 'components', or None if no
+              frame header is found before the scan data
+    """
+    if content[:2] != JPEG_SOI:
+        return None
+
+    offset = 2
+    while offset + 4 <= len(content):
+        if content[offset] != 0xFF:
+            return None
+        marker = content[offset + 1]
+
+        # Padding bytes before a marker
+        if marker == 0xFF:
+            offset += 1
+            continue
+        # Standalone markers carry no length
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            offset += 2
+            continue
+        # End of image or start of scan before any frame header
+        if marker in (0xD9, 0xDA):
+            return None
+
+        (length,) = struct.unpack_from('>H', content, offset + 2)
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 10 > len(content):
+                return None
+            bit_depth, height, width, components = struct.unpack_from('>BHHB', content, offset + 4)
+            return {
+                'width': width,
+                'height': height,
+                'bit_depth': bit_depth,
+                'components': components,
+            }
+
+        offset += 2 + length
+
+    return None
+
+def jpeg_to_pdf(content):
+    """
+    Wrap a JPEG in a 4x6 PDF by copying it verbatim as a DCTDecode stream
+
+    PDF viewers and printers decode JPEG data natively, so the image is
+    embedded without decoding or re-compressing it. Only 8-bit greyscale
+    and YCbCr/RGB JPEGs are embedded this way.
+
+    Args:
+        content (bytes): Raw JPEG file content
+
+    Returns:
+        bytearray: PDF file content, or None if the JPEG can't be embedded directly
+    """
+    info = parse_jpeg(content)
+    if not info or not info['width'] or not info['height']:
+        return None
+
+    color_space = JPEG_COLOR_SPACES.get(info['components'])
+    if color_space is None or info['bit_depth'] != 8:
+        return None
+
+    image_dict = (
+        f"/Type /XObject /Subtype /Image /Width {info['width']} /Height {info['height']} "
+        f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /DCTDecode"
+    )
+
+    return build_image_pdf(image_dict, content, info['width'], info['height'])
+
+def build_image_pdf(image_dict, image_data, width, height):
+    """
+    Build a single-page 4x6 PDF that draws one image XObject
+
+    The image is scaled to fit the page while keeping its aspect ratio
+    and centered, leaving the remaining area white.
+
+    Args:
+        image_dict (str): Image XObject dictionary entries (without /Length)
+        image_data (bytes): Encoded image stream
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+
+    Returns:
+        bytearray: PDF file content
+    """
+    scale = min(LABEL_WIDTH / width, LABEL_HEIGHT / height)
+    draw_width = width * scale
+    draw_height = height * scale
+    x_offset = (LABEL_WIDTH - draw_width) / 2
+    y_offset = (LABEL_HEIGHT - draw_height) / 2
+
+    page_content = (
+        f"q {draw_width:.4f} 0 0 {draw_height:.4f} {x_offset:.4f} {y_offset:.4f} cm /Im0 Do Q"
+    ).encode('ascii')
+
+    # Each object body is a tuple of parts so the image data is copied only
+    # once, straight into the output buffer
+    objects = [
+        (b"<< /Type /Catalog /Pages 2 0 R >>",),
+        (b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",),
+        ((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {LABEL_WIDTH} {LABEL_HEIGHT}] "
+            f"/Resources << /XObject << /Im0 4 0 R >> >> /Contents 5 0 R >>"
+        ).encode('ascii'),),
+        _stream_object(image_dict.encode('ascii'), image_data),
+        _stream_object(b"", page_content),
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number
+        for part in body:
+            pdf += part
+        pdf += b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref_offset
+    )
+
+    # Returned as-is; base64 encoding and len() work on the bytearray directly
+    return pdf
+
+def _stream_object(dict_entries, data):
+    """Serialize a PDF stream object body as (header, data, trailer) parts"""
+    if dict_entries:
+        dict_entries += b" "
+    return (b"<< " + dict_entries + b"/Length %d >>\nstream\n" % len(data), data, b"\nendstream")
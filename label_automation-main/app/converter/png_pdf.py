@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+PNG to PDF Label Converter for PrintNode Compatibility
+
+This script converts shipping label images (PNG/JPG) into valid 4x6 inch PDF files
+that are fully compatible with PrintNode printing services.
+
+Usage:
+    CLI: python convert_label.py input.png output.pdf
+    Import: from app.converter.png_pdf import convert_png_to_pdf, convert_image_bytes_to_pdf
+"""
+
+import sys
+import os
+import io
+import stat
+import argparse
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from PIL import Image, ImageOps
+import logging
+
+from app.converter.pdf_builder import JPEG_EOI, JPEG_SOI, build_image_pdf, jpeg_to_pdf, png_to_pdf
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# PDF dimensions for 4x6 inch label (in points: 1 inch = 72 points)
+LABEL_WIDTH = 4 * 72  # 288 points
+LABEL_HEIGHT = 6 * 72  # 432 points
+LABEL_SIZE = (LABEL_WIDTH, LABEL_HEIGHT)
+
+# Supported image formats
+SUPPORTED_FORMATS = {'.png', '.jpg', '.jpeg'}
+
+# Resampling filters for scaling labels; bicubic keeps text and barcodes as
+# sharp as lanczos at a fraction of the cost
+RESAMPLE_FILTERS = {
+    'lanczos': Image.Resampling.LANCZOS,
+    'bicubic': Image.Resampling.BICUBIC,
+    'bilinear': Image.Resampling.BILINEAR,
+}
+DEFAULT_RESAMPLE = 'bicubic'
+
+# Builders that embed an image file's compressed data in a PDF as-is; they
+# return None for images that have to be decoded and re-encoded instead
+DIRECT_EMBEDDERS = {
+    '.png': png_to_pdf,
+    '.jpg': jpeg_to_pdf,
+    '.jpeg': jpeg_to_pdf,
+}
+
+# How far from the end of a JPEG file to look for its end-of-image marker;
+# some encoders pad the file or append data after it
+JPEG_EOI_SEARCH = 4096
+
+# PDF colour space for each image mode written to the PDF
+PDF_COLOR_SPACES = {
+    'RGB': '/DeviceRGB',
+    'L': '/DeviceGray',
+}
+
+class LabelConversionError(Exception):
+    """Custom exception for label conversion errors"""
+    pass
+
+def validate_input_file(input_path):
+    """
+    Validate the input file exists and is a supported format.
+    
+    Args:
+        input_path (str): Path to input image file
+        
+    Returns:
+        Path: Validated Path object
+        
+    Raises:
+        LabelConversionError: If file doesn't exist or unsupported format
+    """
+    input_path = Path(input_path)
+    
+    # Check if file exists, with a single stat() for both checks
+    try:
+        mode = input_path.stat().st_mode
+    except (FileNotFoundError, NotADirectoryError):
+        raise LabelConversionError(f"Input file does not exist: {input_path}")
+    
+    # Check if file is readable
+    if not stat.S_ISREG(mode):
+        raise LabelConversionError(f"Input path is not a file: {input_path}")
+    
+    # Check file extension
+    if input_path.suffix.lower() not in SUPPORTED_FORMATS:
+        raise LabelConversionError(
+            f"Unsupported file format: {input_path.suffix}. "
+            f"Supported formats: {', '.join(SUPPORTED_FORMATS)}"
+        )
+    
+    return input_path
+
+def load_and_validate_image(input_path):
+    """
+    Load and validate the image file.
+    
+    Args:
+        input_path (Path): Path to input image file
+        
+    Returns:
+        PIL.Image: Loaded and validated image
+        
+    Raises:
+        LabelConversionError: If image cannot be loaded or processed
+    """
+    try:
+        image = Image.open(input_path)
+        
+        # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding;
+        # the label is rendered at 288x432 so full-resolution pixels are wasted
+        image.draft(None, (int(LABEL_WIDTH), int(LABEL_HEIGHT)))
+        # Decode now so a truncated or corrupt file fails here, not mid-scaling
+        image.load()
+        
+        # Convert to RGB if needed (removes transparency, handles CMYK, etc.)
+        if image.mode not in ('RGB', 'L'):
+            logger.info("Converting image from %s to RGB mode", image.mode)
+            image = flatten_to_rgb(image)
+        
+        # Log image information
+        logger.info("Loaded image: %dx%d pixels, mode: %s", image.width, image.height, image.mode)
+        
+        # Check if image is already close to 4:6 ratio
+        width, height = image.size
+        current_ratio = width / height
+        target_ratio = LABEL_WIDTH / LABEL_HEIGHT  # 4/6 = 0.667
+        
+        if abs(current_ratio - target_ratio) > 0.1:
+            logger.warning(
+                "Image ratio (%.3f) differs significantly from 4:6 ratio (%.3f). "
+                "Image will be scaled with white padding to maintain aspect ratio.",
+                current_ratio, target_ratio
+            )
+        
+        return image
+        
+    except Exception as e:
+        raise LabelConversionError(f"Failed to load image: {e}")
+
+def verify_image_data(content):
+    """
+    Check that PNG/JPG file content is complete and undamaged, without decoding it
+    
+    Used before image data is copied into a PDF as-is. Pillow checks every PNG
+    chunk's CRC; a JPEG must have its end-of-image marker near the end of the file.
+    
+    Args:
+        content (bytes-like): Raw image file content
+        
+    Raises:
+        LabelConversionError: If the image is truncated or corrupt
+    """
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image.verify()
+    except Exception as e:
+        raise LabelConversionError(f"Invalid or corrupt image: {e}")
+    
+    # Pillow's verify doesn't read JPEG scan data, so check the file wasn't cut short
+    if content[:2] == JPEG_SOI and JPEG_EOI not in bytes(content[-JPEG_EOI_SEARCH:]):
+        raise LabelConversionError("Invalid or corrupt image: JPEG data is truncated")
+
+def flatten_to_rgb(image):
+    """
+    Convert an image to RGB, drawing any transparent areas on white.
+    
+    A plain convert('RGB') drops the alpha channel, which turns the fully
+    transparent background of many label PNGs black.
+    
+    Args:
+        image (PIL.Image): Input image in any mode
+        
+    Returns:
+        PIL.Image: RGB image
+    """
+    if image.mode in ('LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+    
+    if image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    
+    return image.convert('RGB')
+
+def scale_image_to_label_size(image, resample=DEFAULT_RESAMPLE):
+    """
+    Scale image to fit 4x6 label while maintaining aspect ratio.
+    Adds white background if needed.
+    
+    Args:
+        image (PIL.Image): Input image
+        resample (str): Resampling filter name, a key of RESAMPLE_FILTERS
+        
+    Returns:
+        PIL.Image: Scaled image ready for PDF conversion
+    """
+    # Calculate the scaling factor to fit within label dimensions
+    img_width, img_height = image.size
+    scale_width = LABEL_WIDTH / img_width
+    scale_height = LABEL_HEIGHT / img_height
+    
+    # Use the smaller scale factor to ensure image fits within bounds
+    scale_factor = min(scale_width, scale_height)
+    
+    # Calculate new dimensions
+    new_width = int(img_width * scale_factor)
+    new_height = int(img_height * scale_factor)
+    
+    logger.info("Scaling image from %dx%d to %dx%d", img_width, img_height, new_width, new_height)
+    
+    factor = img_width // int(LABEL_WIDTH)
+    if factor >= 1 and (img_width, img_height) == (factor * int(LABEL_WIDTH), factor * int(LABEL_HEIGHT)):
+        # Labels rendered at the label size or an exact multiple of it only
+        # need an integer box reduction, no filtered resize
+        scaled_image = image.reduce(factor) if factor > 1 else image
+    else:
+        # reducing_gap does a cheap integer box reduction first so large images
+        # aren't filtered at full size
+        scaled_image = image.resize((new_width, new_height), RESAMPLE_FILTERS[resample], reducing_gap=3.0)
+    
+    if scaled_image.size == (int(LABEL_WIDTH), int(LABEL_HEIGHT)) and scaled_image.mode == 'RGB':
+        logger.info("Created final image: %dx%d pixels", new_width, new_height)
+        return scaled_image
+    
+    # Create a white background of exact label size
+    background = Image.new('RGB', (int(LABEL_WIDTH), int(LABEL_HEIGHT)), 'white')
+    
+    # Calculate position to center the scaled image
+    x_offset = (int(LABEL_WIDTH) - new_width) // 2
+    y_offset = (int(LABEL_HEIGHT) - new_height) // 2
+    
+    # Paste the scaled image onto the white background
+    background.paste(scaled_image, (x_offset, y_offset))
+    
+    logger.info("Created final image: %dx%d pixels", background.width, background.height)
+    
+    return background
+
+def create_pdf_from_image(image, output_path):
+    """
+    Create a PDF file from the processed image.
+    
+    The pixels are written as a single FlateDecode image on a 4x6 inch page,
+    without going through a PDF drawing library.
+    
+    Args:
+        image (PIL.Image): Processed image ready for PDF
+        output_path (Path or file-like): Output PDF file path or writable binary buffer
+        
+    Raises:
+        LabelConversionError: If PDF creation fails
+    """
+    try:
+        if image.mode not in PDF_COLOR_SPACES:
+            image = image.convert('RGB')
+        
+        width, height = image.size
+        image_dict = (
+            f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace {PDF_COLOR_SPACES[image.mode]} /BitsPerComponent 8 /Filter /FlateDecode"
+        )
+        pdf = build_image_pdf(image_dict, zlib.compress(image.tobytes()), width, height)
+        
+        # Save the PDF
+        if hasattr(output_path, 'write'):
+            output_path.write(pdf)
+        else:
+            with open(output_path, 'wb') as f:
+                f.write(pdf)
+        logger.info("Successfully created PDF: %s", output_path)
+            
+    except Exception as e:
+        raise LabelConversionError(f"Failed to create PDF: {e}")
+
+def convert_png_to_pdf(input_path, output_path, overwrite=False, resample=DEFAULT_RESAMPLE):
+    """
+    Convert a PNG/JPG image to a 4x6 inch PDF suitable for PrintNode.
+    
+    Args:
+        input_path (str): Path to input image file
+        output_path (str): Path for output PDF file
+        overwrite (bool): Whether to overwrite existing output files
+        resample (str): Resampling filter name, a key of RESAMPLE_FILTERS
+        
+    Returns:
+        bool: True if conversion successful
+        
+    Raises:
+        LabelConversionError: If conversion fails at any step
+    """
+    # Validate input
+    input_path = validate_input_file(input_path)
+    output_path = Path(output_path)
+    
+    # Check if output file already exists
+    if output_path.exists() and not overwrite:
+        raise LabelConversionError(
+            f"Output file already exists: {output_path}. Use --overwrite flag to replace it."
+        )
+    
+    # Ensure output directory exists
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    logger.info("Converting %s -> %s", input_path, output_path)
+    
+    # Copy the compressed image data straight into the PDF when the format allows;
+    # the image is checked first, since nothing else would notice a damaged file
+    image_content = input_path.read_bytes()
+    pdf_content = DIRECT_EMBEDDERS[input_path.suffix.lower()](image_content)
+    if pdf_content is not None:
+        try:
+            verify_image_data(image_content)
+        except LabelConversionError as e:
+            logger.warning("Not embedding image data directly: %s", e)
+            pdf_content = None
+    if pdf_content is not None:
+        logger.info("Embedding image data in the PDF without re-encoding")
+        output_path.write_bytes(pdf_content)
+    else:
+        # Load and process the image
+        image = load_and_validate_image(input_path)
+        
+        # Scale image to proper label size
+        processed_image = scale_image_to_label_size(image, resample)
+        
+        # Create the PDF
+        create_pdf_from_image(processed_image, output_path)
+    
+    # Verify the output file was created
+    if not output_path.exists():
+        raise LabelConversionError("PDF file was not created successfully")
+    
+    file_size = output_path.stat().st_size
+    logger.info("Conversion complete! Output file size: %d bytes", file_size)
+    
+    return True
+
+def convert_image_bytes_to_pdf(image_content):
+    """
+    Convert in-memory PNG/JPG content to a 4x6 inch PDF without touching disk.
+    
+    Args:
+        image_content (bytes or file-like): Raw image file content, or a readable binary buffer
+        
+    Returns:
+        memoryview: PDF file content
+        
+    Raises:
+        LabelConversionError: If conversion fails at any step
+    """
+    # Load and process the image
+    if not hasattr(image_content, 'read'):
+        image_content = io.BytesIO(image_content)
+    image = load_and_validate_image(image_content)
+    
+    # Scale image to proper label size
+    processed_image = scale_image_to_label_size(image)
+    
+    # Create the PDF in memory
+    output = io.BytesIO()
+    create_pdf_from_image(processed_image, output)
+    # A view of the buffer rather than a copy of it
+    pdf_content = output.getbuffer()
+    
+    logger.info("Conversion complete! Output size: %d bytes", len(pdf_content))
+    
+    return pdf_content
+
+def convert_folder(input_folder, output_folder=None, overwrite=False, workers=None, resample=DEFAULT_RESAMPLE):
+    """
+    Convert all supported image files in a folder to PDFs.
+    
+    Files are converted in parallel worker processes, since each conversion
+    is independent and CPU-bound.
+    
+    Args:
+        input_folder (str): Path to folder containing images
+        output_folder (str): Path to output folder (defaults to input_folder)
+        overwrite (bool): Whether to overwrite existing files
+        workers (int): Number of worker processes (defaults to the CPU count;
+            1 converts in this process)
+        resample (str): Resampling filter name, a key of RESAMPLE_FILTERS
+        
+    Returns:
+        list: List of successfully converted files
+    """
+    input_folder = Path(input_folder)
+    if output_folder is None:
+        output_folder = input_folder
+    else:
+        output_folder = Path(output_folder)
+    
+    if not input_folder.exists():
+        raise LabelConversionError(f"Input folder does not exist: {input_folder}")
+    
+    # Find all supported image files in one pass over the folder; extensions
+    # match in any case
+    with os.scandir(input_folder) as entries:
+        image_files = sorted(
+            Path(entry.path) for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_FORMATS
+        )
+    
+    if not image_files:
+        logger.warning("No supported image files found in %s", input_folder)
+        return []
+    
+    logger.info("Found %d image files to convert", len(image_files))
+    
+    converted_files = []
+    failed_files = []
+    
+    # Create output paths with .pdf extension; images sharing a name (label.png
+    # and label.jpg) would write the same PDF, so only the first one is converted
+    jobs = []
+    output_names = set()
+    for image_file in image_files:
+        output_file = output_folder / f"{image_file.stem}.pdf"
+        output_name = os.path.normcase(output_file)
+        if output_name in output_names:
+            logger.error("Skipping %s: another image in the folder already converts to %s", image_file, output_file)
+            failed_files.append(str(image_file))
+            continue
+        output_names.add(output_name)
+        jobs.append((image_file, output_file))
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    
+    if workers <= 1:
+        for image_file, output_file in jobs:
+            try:
+                convert_png_to_pdf(image_file, output_file, overwrite=overwrite, resample=resample)
+                converted_files.append(str(output_file))
+            except Exception as e:
+                logger.error("Failed to convert %s: %s", image_file, e)
+                failed_files.append(str(image_file))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(convert_png_to_pdf, image_file, output_file, overwrite, resample): (image_file, output_file)
+                for image_file, output_file in jobs
+            }
+            for future in as_completed(futures):
+                image_file, output_file = futures[future]
+                try:
+                    future.result()
+                    converted_files.append(str(output_file))
+                except Exception as e:
+                    logger.error("Failed to convert %s: %s", image_file, e)
+                    failed_files.append(str(image_file))
+    
+    logger.info("Conversion complete: %d successful, %d failed", len(converted_files), len(failed_files))
+    
+    if failed_files:
+        logger.warning("Failed files: %s", ', '.join(failed_files))
+    
+    return converted_files
+
+def main(argv=None):
+    """Main CLI entry point; argv defaults to the command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Convert shipping label images to 4x6 inch PDFs compatible with PrintNode",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    python convert_label.py label.png label.pdf
+    python convert_label.py /path/to/label.jpg /path/to/output.pdf --overwrite
+    python convert_label.py --folder /path/to/labels/
+    python convert_label.py --folder /path/to/input/ --output-folder /path/to/output/
+        """
+    )
+    
+    # Input/output arguments
+    parser.add_argument('input', nargs='?', help='Input image file path')
+    parser.add_argument('output', nargs='?', help='Output PDF file path')
+    
+    # Folder processing
+    parser.add_argument('--folder', help='Convert all images in a folder')
+    parser.add_argument('--output-folder', help='Output folder for batch conversion')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for batch conversion (default: CPU count)')
+    
+    # Options
+    parser.add_argument('--overwrite', action='store_true', 
+                       help='Overwrite existing output files')
+    parser.add_argument('--resample', choices=sorted(RESAMPLE_FILTERS), default=DEFAULT_RESAMPLE,
+                       help=f'Resampling filter for scaling (default: {DEFAULT_RESAMPLE}; '
+                            f'try lanczos if barcodes fail to scan)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Enable verbose logging')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Suppress all output except errors')
+    
+    args = parser.parse_args(argv)
+    
+    # Configure logging level
+    if args.quiet:
+        logging.getLogger().setLevel(logging.ERROR)
+    elif args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
+    try:
+        if args.folder:
+            # Folder mode
+            convert_folder(args.folder, args.output_folder, args.overwrite, args.workers, args.resample)
+        else:
+            # Single file mode
+            if not args.input or not args.output:
+                parser.error("Input and output paths are required for single file conversion")
+            
+            convert_png_to_pdf(args.input, args.output, args.overwrite, args.resample)
+            
+        return 0
+        
+    except LabelConversionError as e:
+        logger.error("Conversion failed: %s", e)
+        return 1
+    except KeyboardInterrupt:
+        logger.info("Conversion cancelled by user")
+        return 1
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main()) 
\ No newline at end of file
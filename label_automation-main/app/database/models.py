@@ -1,11 +1,42 @@
 import sqlite3
 import json
+import logging
 import os
+import sys
+import threading
+from itertools import groupby
 from typing import List, Dict, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, replace
 from datetime import datetime
+from app.config import Config
+from app.utils.cache import TTLCache
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Columns are listed explicitly so rows unpack positionally into the dataclasses
+_ACCOUNT_COLUMNS = 'id, name, api_key, webhook_secret, is_active, created_at, updated_at'
+_PRINTER_COLUMNS = ('id, account_id, printer_name, printnode_api_key, printer_id, '
+                    'is_default, is_active, created_at, updated_at, accepted_formats')
+
+# Account lookups by (db_path, id), shared by every AccountDatabase instance so
+# updates made through one instance invalidate reads made through another
+_account_cache = TTLCache(maxsize=256, ttl=60)
+
+# Active account lists by db_path; dropped whenever accounts are written
+_account_list_cache = TTLCache(maxsize=8, ttl=30)
+
+# Default printer lookups by (db_path, account_id); None is cached for
+# accounts without a printer, so a miss is told apart with _MISSING
+_default_printer_cache = TTLCache(maxsize=1024, ttl=60)
+_MISSING = object()
+
+# BOOLEAN columns come back as Python bools (needs detect_types=PARSE_DECLTYPES)
+sqlite3.register_converter('BOOLEAN', lambda value: value not in (b'0', b''))
+
+# Slotted records are smaller and faster to read; dataclass(slots=...) needs 3.10+
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class EasyPostAccount:
     """EasyPost account configuration"""
     id: str
@@ -15,8 +46,20 @@ class EasyPostAccount:
     is_active: bool = True
     created_at: str = None
     updated_at: str = None
+    
+    def to_dict(self) -> Dict:
+        """Plain dict of the account's fields, for JSON export"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'api_key': self.api_key,
+            'webhook_secret': self.webhook_secret,
+            'is_active': self.is_active,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
 
-@dataclass 
+@dataclass(**_DATACLASS_OPTIONS)
 class PrinterConfig:
     """Printer configuration for an account"""
     id: str
@@ -28,205 +71,328 @@ class PrinterConfig:
     is_active: bool = True
     created_at: str = None
     updated_at: str = None
+    accepted_formats: Optional[str] = None  # JSON list of label formats printed without conversion
+    
+    def get_accepted_formats(self) -> Optional[set]:
+        """Label formats this printer can print as-is, or None if not configured"""
+        if not self.accepted_formats:
+            return None
+        return {fmt.lower() for fmt in json.loads(self.accepted_formats)}
+    
+    def to_dict(self) -> Dict:
+        """Plain dict of the printer's fields, for JSON export"""
+        return {
+            'id': self.id,
+            'account_id': self.account_id,
+            'printer_name': self.printer_name,
+            'printnode_api_key': self.printnode_api_key,
+            'printer_id': self.printer_id,
+            'is_default': self.is_default,
+            'is_active': self.is_active,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'accepted_formats': self.accepted_formats,
+        }
 
 class AccountDatabase:
     """Database manager for accounts and printers"""
     
     def __init__(self, db_path: str = "accounts.db"):
         self.db_path = db_path
+        self._tls = threading.local()
         self.init_database()
     
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it in WAL mode on first use"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            # Autocommit mode; each statement is its own transaction
+            # A larger statement cache keeps every query this class issues prepared
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                   detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA mmap_size=268435456')
+            self._tls.conn = conn
+        return conn
+    
     def init_database(self):
         """Initialize database tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # EasyPost accounts table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS easypost_accounts (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    api_key TEXT NOT NULL,
-                    webhook_secret TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Printer configurations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS printer_configs (
-                    id TEXT PRIMARY KEY,
-                    account_id TEXT NOT NULL,
-                    printer_name TEXT NOT NULL,
-                    printnode_api_key TEXT NOT NULL,
-                    printer_id TEXT NOT NULL,
-                    is_default BOOLEAN DEFAULT 0,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (account_id) REFERENCES easypost_accounts (id)
-                )
-            ''')
-            
-            conn.commit()
+        conn = self._conn()
+        cursor = conn.cursor()
+        
+        # EasyPost accounts table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS easypost_accounts (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                api_key TEXT NOT NULL,
+                webhook_secret TEXT,
+                is_active BOOLEAN DEFAULT 1,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Printer configurations table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS printer_configs (
+                id TEXT PRIMARY KEY,
+                account_id TEXT NOT NULL,
+                printer_name TEXT NOT NULL,
+                printnode_api_key TEXT NOT NULL,
+                printer_id TEXT NOT NULL,
+                is_default BOOLEAN DEFAULT 0,
+                is_active BOOLEAN DEFAULT 1,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                accepted_formats TEXT,
+                FOREIGN KEY (account_id) REFERENCES easypost_accounts (id)
+            )
+        ''')
+        
+        # Add columns introduced after the table was first created
+        printer_columns = {row['name'] for row in cursor.execute('PRAGMA table_info(printer_configs)')}
+        if 'accepted_formats' not in printer_columns:
+            cursor.execute('ALTER TABLE printer_configs ADD COLUMN accepted_formats TEXT')
+        
+        # Indexes for the per-account printer and active-account lookups
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_printer_account ON printer_configs(account_id, is_active)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_accounts_active ON easypost_accounts(is_active)')
     
     def add_easypost_account(self, account: EasyPostAccount) -> bool:
         """Add a new EasyPost account"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO easypost_accounts (id, name, api_key, webhook_secret, is_active)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (account.id, account.name, account.api_key, account.webhook_secret, account.is_active))
-                conn.commit()
-                return True
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO easypost_accounts (id, name, api_key, webhook_secret, is_active)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (account.id, account.name, account.api_key, account.webhook_secret, account.is_active))
+            _account_list_cache.pop(self.db_path)
+            return True
         except Exception as e:
-            print(f"Error adding EasyPost account: {e}")
+            logger.exception("Error adding EasyPost account: %s", e)
             return False
     
     def get_easypost_account(self, account_id: str) -> Optional[EasyPostAccount]:
-        """Get EasyPost account by ID"""
+        """Get EasyPost account by ID (cached for a short time)"""
+        cache_key = (self.db_path, account_id)
+        account = _account_cache.get(cache_key)
+        if account is not None:
+            # Hand out a copy so callers editing it don't alter the cached entry
+            return replace(account)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM easypost_accounts WHERE id = ?', (account_id,))
-                row = cursor.fetchone()
-                
-                if row:
-                    return EasyPostAccount(
-                        id=row[0], name=row[1], api_key=row[2], webhook_secret=row[3],
-                        is_active=bool(row[4]), created_at=row[5], updated_at=row[6]
-                    )
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {_ACCOUNT_COLUMNS} FROM easypost_accounts WHERE id = ?', (account_id,))
+            row = cursor.fetchone()
+            if not row:
                 return None
+            
+            account = EasyPostAccount(*row)
+            _account_cache[cache_key] = replace(account)
+            return account
         except Exception as e:
-            print(f"Error getting EasyPost account: {e}")
+            logger.exception("Error getting EasyPost account: %s", e)
             return None
     
     def get_all_easypost_accounts(self) -> List[EasyPostAccount]:
-        """Get all EasyPost accounts"""
+        """Get all EasyPost accounts (cached for a short time; treat as read-only)"""
+        accounts = _account_list_cache.get(self.db_path)
+        if accounts is not None:
+            return list(accounts)
+        
+        try:
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT {_ACCOUNT_COLUMNS} FROM easypost_accounts WHERE is_active = 1')
+            
+            accounts = [EasyPostAccount(*row) for row in cursor.fetchall()]
+            _account_list_cache[self.db_path] = tuple(accounts)
+            return accounts
+        except Exception as e:
+            logger.exception("Error getting EasyPost accounts: %s", e)
+            return []
+    
+    def get_accounts_with_printer_counts(self) -> List[Dict]:
+        """Get all active accounts with their number of active printers, in one query"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM easypost_accounts WHERE is_active = 1')
-                rows = cursor.fetchall()
-                
-                accounts = []
-                for row in rows:
-                    accounts.append(EasyPostAccount(
-                        id=row[0], name=row[1], api_key=row[2], webhook_secret=row[3],
-                        is_active=bool(row[4]), created_at=row[5], updated_at=row[6]
-                    ))
-                return accounts
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT a.id, a.name, a.is_active, COUNT(p.id) AS printers_count
+                FROM easypost_accounts a
+                LEFT JOIN printer_configs p ON p.account_id = a.id AND p.is_active = 1
+                WHERE a.is_active = 1
+                GROUP BY a.id
+                ORDER BY a.rowid
+            ''')
+            
+            return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
-            print(f"Error getting EasyPost accounts: {e}")
+            logger.exception("Error getting accounts with printer counts: %s", e)
             return []
     
     def add_printer_config(self, printer: PrinterConfig) -> bool:
         """Add a new printer configuration"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO printer_configs (id, account_id, printer_name, printnode_api_key, printer_id, is_default, is_active)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (printer.id, printer.account_id, printer.printer_name, 
-                      printer.printnode_api_key, printer.printer_id, printer.is_default, printer.is_active))
-                conn.commit()
-                return True
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO printer_configs (id, account_id, printer_name, printnode_api_key, printer_id, is_default, is_active, accepted_formats)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (printer.id, printer.account_id, printer.printer_name, 
+                  printer.printnode_api_key, printer.printer_id, printer.is_default, printer.is_active,
+                  printer.accepted_formats))
+            _default_printer_cache.pop((self.db_path, printer.account_id))
+            return True
         except Exception as e:
-            print(f"Error adding printer config: {e}")
+            logger.exception("Error adding printer config: %s", e)
             return False
     
     def get_printers_for_account(self, account_id: str) -> List[PrinterConfig]:
         """Get all printer configurations for an account"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM printer_configs WHERE account_id = ? AND is_active = 1', (account_id,))
-                rows = cursor.fetchall()
-                
-                printers = []
-                for row in rows:
-                    printers.append(PrinterConfig(
-                        id=row[0], account_id=row[1], printer_name=row[2],
-                        printnode_api_key=row[3], printer_id=row[4], is_default=bool(row[5]),
-                        is_active=bool(row[6]), created_at=row[7], updated_at=row[8]
-                    ))
-                return printers
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {_PRINTER_COLUMNS} FROM printer_configs WHERE account_id = ? AND is_active = 1',
+                (account_id,)
+            )
+            
+            return [PrinterConfig(*row) for row in cursor.fetchall()]
         except Exception as e:
-            print(f"Error getting printer configs: {e}")
+            logger.exception("Error getting printer configs: %s", e)
             return []
     
     def get_default_printer_for_account(self, account_id: str) -> Optional[PrinterConfig]:
-        """Get the default printer for an account"""
-        printers = self.get_printers_for_account(account_id)
-        for printer in printers:
-            if printer.is_default:
-                return printer
-        # If no default, return the first active printer
-        return printers[0] if printers else None
+        """Get the default printer for an account, or the first active printer if none is default"""
+        cache_key = (self.db_path, account_id)
+        printer = _default_printer_cache.get(cache_key, _MISSING)
+        if printer is not _MISSING:
+            # Copy so callers can't modify the cached entry
+            return replace(printer) if printer else None
+        
+        try:
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {_PRINTER_COLUMNS} FROM printer_configs
+                WHERE account_id = ? AND is_active = 1
+                ORDER BY is_default DESC, rowid
+                LIMIT 1
+            ''', (account_id,))
+            row = cursor.fetchone()
+            
+            printer = PrinterConfig(*row) if row else None
+            _default_printer_cache[cache_key] = replace(printer) if printer else None
+            return printer
+        except Exception as e:
+            logger.exception("Error getting default printer: %s", e)
+            return None
     
     def update_easypost_account(self, account: EasyPostAccount) -> bool:
         """Update an EasyPost account"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE easypost_accounts 
-                    SET name = ?, api_key = ?, webhook_secret = ?, is_active = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (account.name, account.api_key, account.webhook_secret, account.is_active, account.id))
-                conn.commit()
-                return cursor.rowcount > 0
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE easypost_accounts 
+                SET name = ?, api_key = ?, webhook_secret = ?, is_active = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (account.name, account.api_key, account.webhook_secret, account.is_active, account.id))
+            _account_cache.pop((self.db_path, account.id))
+            _account_list_cache.pop(self.db_path)
+            return cursor.rowcount > 0
         except Exception as e:
-            print(f"Error updating EasyPost account: {e}")
+            logger.exception("Error updating EasyPost account: %s", e)
             return False
     
     def delete_easypost_account(self, account_id: str) -> bool:
         """Soft delete an EasyPost account"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('UPDATE easypost_accounts SET is_active = 0 WHERE id = ?', (account_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+            conn = self._conn()
+            cursor = conn.cursor()
+            cursor.execute('UPDATE easypost_accounts SET is_active = 0 WHERE id = ?', (account_id,))
+            _account_cache.pop((self.db_path, account_id))
+            _account_list_cache.pop(self.db_path)
+            return cursor.rowcount > 0
         except Exception as e:
-            print(f"Error deleting EasyPost account: {e}")
+            logger.exception("Error deleting EasyPost account: %s", e)
             return False
     
     def export_config(self) -> Dict:
         """Export all configurations as JSON"""
         accounts = self.get_all_easypost_accounts()
+        
+        # One query for every active printer, grouped by account in Python
+        conn = self._conn()
+        rows = conn.execute(
+            f'SELECT {_PRINTER_COLUMNS} FROM printer_configs WHERE is_active = 1 ORDER BY account_id, rowid'
+        ).fetchall()
+        printers_by_account = {
+            account_id: [PrinterConfig(*row) for row in group]
+            for account_id, group in groupby(rows, key=lambda row: row['account_id'])
+        }
+        
         config = {
             "accounts": [],
             "export_timestamp": datetime.now().isoformat()
         }
         
         for account in accounts:
-            account_data = asdict(account)
-            account_data["printers"] = [asdict(p) for p in self.get_printers_for_account(account.id)]
+            account_data = account.to_dict()
+            account_data["printers"] = [p.to_dict() for p in printers_by_account.get(account.id, [])]
             config["accounts"].append(account_data)
         
         return config
     
     def import_config(self, config: Dict) -> bool:
-        """Import configurations from JSON"""
+        """Import configurations from JSON in a single transaction"""
+        conn = self._conn()
         try:
+            accounts = []
+            printers = []
             for account_data in config.get("accounts", []):
-                # Create account
-                printers = account_data.pop("printers", [])
-                account = EasyPostAccount(**account_data)
-                self.add_easypost_account(account)
-                
-                # Create printers
-                for printer_data in printers:
-                    printer = PrinterConfig(**printer_data)
-                    self.add_printer_config(printer)
+                account_data = dict(account_data)
+                printers.extend(PrinterConfig(**p) for p in account_data.pop("printers", []))
+                accounts.append(EasyPostAccount(**account_data))
+            
+            # Rows that already exist are skipped, as the per-row inserts used to do
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('''
+                INSERT OR IGNORE INTO easypost_accounts (id, name, api_key, webhook_secret, is_active)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(a.id, a.name, a.api_key, a.webhook_secret, a.is_active) for a in accounts])
+            conn.executemany('''
+                INSERT OR IGNORE INTO printer_configs (id, account_id, printer_name, printnode_api_key, printer_id, is_default, is_active, accepted_formats)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(p.id, p.account_id, p.printer_name, p.printnode_api_key, p.printer_id,
+                   p.is_default, p.is_active, p.accepted_formats) for p in printers])
+            conn.execute('COMMIT')
+            _account_list_cache.pop(self.db_path)
+            _default_printer_cache.clear()
             
             return True
         except Exception as e:
-            print(f"Error importing config: {e}")
-            return False 
\ No newline at end of file
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.exception("Error importing config: %s", e)
+            return False
+
+# Shared instance, created on first use
+_instance: Optional[AccountDatabase] = None
+_instance_lock = threading.Lock()
+
+def get_account_database() -> AccountDatabase:
+    """Get the shared AccountDatabase for Config.DATABASE_PATH, creating it on first call"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = AccountDatabase(Config.DATABASE_PATH)
+    return _instance
\ No newline at end of file
@@ -1,15 +1,21 @@
+import io
 import logging
-import os
-from easypost import EasyPostClient
+from typing import Optional, BinaryIO
+from app.config import Config
+from app.utils.http import get_shared_session
+from app.easypost.multi_client import new_easypost_client
 
 logger = logging.getLogger(__name__)
 
+# Shared session so label downloads reuse TCP/TLS connections
+_SESSION = get_shared_session()
+
 def get_easypost_client():
     """Get configured EasyPost client"""
-    api_key = os.getenv('EASYPOST_API_KEY')
+    api_key = Config.EASYPOST_API_KEY
     if not api_key:
         raise ValueError("EASYPOST_API_KEY environment variable is required")
-    return EasyPostClient(api_key)
+    return new_easypost_client(api_key)
 
 def get_label_from_shipment(shipment_id):
     """
@@ -27,16 +33,17 @@ def get_label_from_shipment(shipment_id):
         client = get_easypost_client()
         shipment = client.shipment.retrieve(shipment_id)
         
-        if not hasattr(shipment, 'postage_label') or not shipment.postage_label:
+        postage_label = getattr(shipment, 'postage_label', None)
+        if not postage_label:
             logger.error(f"No label found for shipment: {shipment_id}")
             return None
             
         label_data = {
             "shipment_id": shipment_id,
-            "label_url": shipment.postage_label.label_url,
-            "label_file_type": shipment.postage_label.label_file_type,
+            "label_url": postage_label.label_url,
+            "label_file_type": postage_label.label_file_type,
             "tracking_code": shipment.tracking_code,
-            "created_at": shipment.postage_label.created_at
+            "created_at": postage_label.created_at
         }
         
         logger.info(f"Successfully retrieved label: {label_data['label_url']}")
@@ -46,26 +53,43 @@ def get_label_from_shipment(shipment_id):
         logger.exception(f"Error retrieving label for shipment {shipment_id}: {str(e)}")
         return None
 
-def download_label_content(label_url):
+def download_label_content(label_url, sink: Optional[BinaryIO] = None):
     """
     Download label content from URL
     
+    Labels larger than Config.MAX_LABEL_SIZE are rejected.
+    
     Args:
         label_url (str): URL to the label file
+        sink (BinaryIO): Optional writable buffer to stream the label into
         
     Returns:
-        bytes: Label file content, or None if download fails
+        bytes: Label file content (or the sink, if one was given), or None if download fails
     """
     try:
-        import requests
-        
         logger.info(f"Downloading label from: {label_url}")
         
-        response = requests.get(label_url, timeout=30)
-        response.raise_for_status()
+        max_size = Config.MAX_LABEL_SIZE
+        buffer = sink if sink is not None else io.BytesIO()
+        
+        with _SESSION.get(label_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            
+            # Refuse oversized labels up front so memory per webhook stays bounded
+            content_length = int(response.headers.get('Content-Length') or 0)
+            if content_length > max_size:
+                raise ValueError(f"Label is {content_length} bytes, over the {max_size} byte limit")
+            
+            # Stream straight into the buffer, no intermediate copy
+            size = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                size += len(chunk)
+                if size > max_size:
+                    raise ValueError(f"Label exceeds the {max_size} byte limit")
+                buffer.write(chunk)
         
-        logger.info(f"Successfully downloaded label ({len(response.content)} bytes)")
-        return response.content
+        logger.info(f"Successfully downloaded label ({size} bytes)")
+        return buffer if sink is not None else buffer.getvalue()
         
     except Exception as e:
         logger.exception(f"Error downloading label from {label_url}: {str(e)}")
@@ -1,52 +1,120 @@
+import io
 import logging
-import os
-from typing import Optional, Dict
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, BinaryIO
 from easypost import EasyPostClient
-from app.database.models import AccountDatabase, EasyPostAccount
+from app.config import Config
+from app.utils.http import get_shared_session
+from app.database.models import AccountDatabase, EasyPostAccount, get_account_database
 
 logger = logging.getLogger(__name__)
 
+# Shared session so label downloads reuse TCP/TLS connections
+_SESSION = get_shared_session()
+
+# Most EasyPost clients kept alive at once; each holds its own connection pool
+MAX_CLIENTS = 128
+
+def new_easypost_client(api_key: str) -> EasyPostClient:
+    """
+    Create an EasyPost client
+    
+    The SDK keeps a Session per client, so its connections are reused for as
+    long as the client is cached. API errors surface as the SDK's own error types.
+    """
+    return EasyPostClient(api_key)
+
 class MultiEasyPostManager:
     """Manager for multiple EasyPost accounts"""
     
     def __init__(self, db_path: str = None):
-        self.db = AccountDatabase(db_path or os.getenv('DATABASE_PATH', 'accounts.db'))
-        self._clients: Dict[str, EasyPostClient] = {}
+        self._db_path = db_path or Config.DATABASE_PATH
+        self._db: Optional[AccountDatabase] = None
+        # Least recently used first, so the oldest client is evicted when full
+        self._clients: Dict[str, EasyPostClient] = OrderedDict()
+        self._lock = threading.RLock()
+    
+    @property
+    def db(self) -> AccountDatabase:
+        """Account database, opened on first access"""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    # Share the app-wide database (and its connections) when possible
+                    if self._db_path == Config.DATABASE_PATH:
+                        self._db = get_account_database()
+                    else:
+                        self._db = AccountDatabase(self._db_path)
+        return self._db
     
     def get_client(self, account_id: str) -> Optional[EasyPostClient]:
         """Get EasyPost client for a specific account"""
-        if account_id in self._clients:
-            return self._clients[account_id]
-        
-        account = self.db.get_easypost_account(account_id)
-        if not account or not account.is_active:
-            logger.error(f"Account {account_id} not found or inactive")
-            return None
-        
-        try:
-            client = EasyPostClient(account.api_key)
-            self._clients[account_id] = client
-            logger.info(f"Created client for account: {account.name}")
+        # Webhooks almost always hit a cached client, so look it up without the lock
+        client = self._clients.get(account_id)
+        if client is not None:
+            self._touch(account_id)
             return client
-        except Exception as e:
-            logger.error(f"Failed to create client for account {account_id}: {e}")
-            return None
+        
+        with self._lock:
+            client = self._clients.get(account_id)
+            if client:
+                self._clients.move_to_end(account_id)
+                return client
+            
+            account = self.db.get_easypost_account(account_id)
+            if not account or not account.is_active:
+                logger.error(f"Account {account_id} not found or inactive")
+                return None
+            
+            try:
+                client = new_easypost_client(account.api_key)
+                self._add_client(account_id, client)
+                logger.info(f"Created client for account: {account.name}")
+                return client
+            except Exception as e:
+                logger.error(f"Failed to create client for account {account_id}: {e}")
+                return None
     
     def get_legacy_client(self) -> Optional[EasyPostClient]:
         """Get client using legacy environment variable (backward compatibility)"""
-        api_key = os.getenv('EASYPOST_API_KEY')
+        api_key = Config.EASYPOST_API_KEY
         if not api_key:
             return None
         
-        if 'legacy' not in self._clients:
-            try:
-                self._clients['legacy'] = EasyPostClient(api_key)
-                logger.info("Created legacy EasyPost client")
-            except Exception as e:
-                logger.error(f"Failed to create legacy client: {e}")
-                return None
+        client = self._clients.get('legacy')
+        if client is not None:
+            self._touch('legacy')
+            return client
         
-        return self._clients['legacy']
+        with self._lock:
+            if 'legacy' not in self._clients:
+                try:
+                    self._add_client('legacy', new_easypost_client(api_key))
+                    logger.info("Created legacy EasyPost client")
+                except Exception as e:
+                    logger.error(f"Failed to create legacy client: {e}")
+                    return None
+            
+            self._clients.move_to_end('legacy')
+            return self._clients['legacy']
+    
+    def _touch(self, key: str):
+        """Mark a cached client as recently used without taking the lock"""
+        # OrderedDict operations are atomic under the GIL; the key may just
+        # have been evicted by another thread, which is harmless here
+        try:
+            self._clients.move_to_end(key)
+        except KeyError:
+            pass
+    
+    def _add_client(self, key: str, client: EasyPostClient):
+        """Cache a client, evicting the least recently used one when full (lock held)"""
+        self._clients[key] = client
+        while len(self._clients) > MAX_CLIENTS:
+            evicted_key, evicted = self._clients.popitem(last=False)
+            _close_client(evicted)
+            logger.info("Evicted EasyPost client for account: %s", evicted_key)
     
     def get_account_for_client(self, account_id: str) -> Optional[EasyPostAccount]:
         """Get account configuration"""
@@ -58,27 +126,55 @@ class MultiEasyPostManager:
     
     def refresh_client(self, account_id: str):
         """Refresh client cache for an account"""
-        if account_id in self._clients:
-            del self._clients[account_id]
+        with self._lock:
+            client = self._clients.pop(account_id, None)
+        if client:
+            _close_client(client)
+    
+    def refresh_clients(self, account_ids):
+        """Refresh client cache for several accounts under a single lock acquisition"""
+        with self._lock:
+            clients = [self._clients.pop(account_id, None) for account_id in account_ids]
+        for client in clients:
+            if client:
+                _close_client(client)
+
+def _close_client(client: EasyPostClient):
+    """Release the sockets held by a client's own HTTP session, if it has one"""
+    session = getattr(client, '_requests_session', None)
+    if session is not None:
+        session.close()
+
+# Global instance, created on first use
+_instance: Optional[MultiEasyPostManager] = None
+_instance_lock = threading.Lock()
 
-# Global instance
-multi_client_manager = MultiEasyPostManager()
+def get_multi_client_manager() -> MultiEasyPostManager:
+    """Get the shared MultiEasyPostManager, creating it on first call"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = MultiEasyPostManager()
+    return _instance
 
 def get_easypost_client_for_account(account_id: str) -> Optional[EasyPostClient]:
     """Get EasyPost client for a specific account"""
-    return multi_client_manager.get_client(account_id)
+    return get_multi_client_manager().get_client(account_id)
 
 def get_easypost_client():
     """Get legacy EasyPost client (backward compatibility)"""
+    manager = get_multi_client_manager()
+    
     # Try legacy client first
-    client = multi_client_manager.get_legacy_client()
+    client = manager.get_legacy_client()
     if client:
         return client
     
     # Fall back to first active account
-    accounts = multi_client_manager.list_accounts()
+    accounts = manager.list_accounts()
     if accounts:
-        return multi_client_manager.get_client(accounts[0].id)
+        return manager.get_client(accounts[0].id)
     
     raise ValueError("No EasyPost configuration found")
 
@@ -107,17 +203,18 @@ def get_label_from_shipment(shipment_id: str, account_id: str = None):
         
         shipment = client.shipment.retrieve(shipment_id)
         
-        if not hasattr(shipment, 'postage_label') or not shipment.postage_label:
+        postage_label = getattr(shipment, 'postage_label', None)
+        if not postage_label:
             logger.error(f"No label found for shipment: {shipment_id}")
             return None
             
         label_data = {
             "shipment_id": shipment_id,
             "account_id": account_id,
-            "label_url": shipment.postage_label.label_url,
-            "label_file_type": shipment.postage_label.label_file_type,
+            "label_url": postage_label.label_url,
+            "label_file_type": postage_label.label_file_type,
             "tracking_code": shipment.tracking_code,
-            "created_at": shipment.postage_label.created_at
+            "created_at": postage_label.created_at
         }
         
         logger.info(f"Successfully retrieved label: {label_data['label_url']}")
@@ -127,27 +224,44 @@ def get_label_from_shipment(shipment_id: str, account_id: str = None):
         logger.exception(f"Error retrieving label for shipment {shipment_id}: {str(e)}")
         return None
 
-def download_label_content(label_url):
+def download_label_content(label_url, sink: Optional[BinaryIO] = None):
     """
     Download label content from URL
     
+    Labels larger than Config.MAX_LABEL_SIZE are rejected.
+    
     Args:
         label_url (str): URL to the label file
+        sink (BinaryIO): Optional writable buffer to stream the label into
         
     Returns:
-        bytes: Label file content, or None if download fails
+        bytes: Label file content (or the sink, if one was given), or None if download fails
     """
     try:
-        import requests
-        
         logger.info(f"Downloading label from: {label_url}")
         
-        response = requests.get(label_url, timeout=30)
-        response.raise_for_status()
+        max_size = Config.MAX_LABEL_SIZE
+        buffer = sink if sink is not None else io.BytesIO()
+        
+        with _SESSION.get(label_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            
+            # Refuse oversized labels up front so memory per webhook stays bounded
+            content_length = int(response.headers.get('Content-Length') or 0)
+            if content_length > max_size:
+                raise ValueError(f"Label is {content_length} bytes, over the {max_size} byte limit")
+            
+            # Stream straight into the buffer, no intermediate copy
+            size = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                size += len(chunk)
+                if size > max_size:
+                    raise ValueError(f"Label exceeds the {max_size} byte limit")
+                buffer.write(chunk)
         
-        logger.info(f"Successfully downloaded label ({len(response.content)} bytes)")
-        return response.content
+        logger.info(f"Successfully downloaded label ({size} bytes)")
+        return buffer if sink is not None else buffer.getvalue()
         
     except Exception as e:
         logger.exception(f"Error downloading label from {label_url}: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -1,12 +1,46 @@
+import io
 import logging
-import os
 from app.easypost.multi_client import get_easypost_client_for_account, get_easypost_client, download_label_content
 from app.converter.label_converter import convert_label_if_needed
 from app.printnode.multi_printer import send_to_printnode_for_account
-from app.database.models import AccountDatabase
+from app.printnode.printer import send_to_printnode
+from app.database.models import get_account_database
+from app.utils.cache import TTLCache
+from app.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Trackers whose label is being or was recently printed, keyed by (account_id, tracker_id);
+# EasyPost may deliver the same event more than once
+_SEEN_TRACKERS = TTLCache(maxsize=10000, ttl=300)
+
+# Log level and message for each print outcome, filled from the print result
+_PRINT_OUTCOME_LOGS = {
+    'submitted': (
+        logging.INFO,
+        "Print job submitted - account: %(account)s, job ID: %(job_id)s, printer ID: %(printer_id)s, "
+        "printer name: %(printer_name)s, title: %(title)s"
+    ),
+    'not_configured': (
+        logging.WARNING,
+        "Label ready for printing - account: %(account)s, status: %(message)s, action needed: %(error)s"
+    ),
+    'failed': (
+        logging.ERROR,
+        "Print job failed - account: %(account)s, error: %(error)s"
+    ),
+}
+
+# Values for the fields a print result may leave out
+_PRINT_OUTCOME_DEFAULTS = {
+    'job_id': None,
+    'printer_id': None,
+    'printer_name': 'Unknown',
+    'title': None,
+    'message': None,
+    'error': None,
+}
+
 def handle_tracker_event(event_data, account_id=None):
     """
     Process tracker events from EasyPost
@@ -18,75 +52,96 @@ def handle_tracker_event(event_data, account_id=None):
     Returns:
         dict: Processing result with label information and print job status
     """
+    # Account name used in log lines
+    account_name = account_id or 'legacy'
+    
     try:
         # Extract tracker ID from the event data
-        tracker_id = event_data.get('result', {}).get('id')
+        tracker_data = event_data.get('result') or {}
+        tracker_id = tracker_data.get('id')
         if not tracker_id:
             logger.error("No tracker ID found in event data")
             return {"success": False, "error": "No tracker ID found"}
         
-        logger.info(f"Processing tracker event for tracker_id: {tracker_id} (account: {account_id or 'legacy'})")
+        # Claim the tracker before doing any work, so concurrent redeliveries
+        # of the same event can't both get past this check
+        seen_key = (account_id, tracker_id)
+        if not _SEEN_TRACKERS.add(seen_key, True):
+            logger.info("Skipping duplicate tracker event for tracker_id: %s (account: %s)",
+                        tracker_id, account_name)
+            return {"success": True, "deduped": True, "account_id": account_id}
+        printed = False
+        
+        logger.info("Processing tracker event for tracker_id: %s (account: %s)", tracker_id, account_name)
         
         # Get tracker details from EasyPost API
         try:
             if account_id:
                 client = get_easypost_client_for_account(account_id)
                 if not client:
-                    logger.error(f"No client available for account: {account_id}")
+                    logger.error("No client available for account: %s", account_id)
                     return {"success": False, "error": f"Account {account_id} not configured"}
             else:
                 client = get_easypost_client()
             
-            tracker = client.tracker.retrieve(tracker_id)
-            logger.info(f"Retrieved tracker with tracking code: {tracker.tracking_code}")
+            # tracker.created events carry the full tracker object, so only ask
+            # EasyPost for it when the payload lacks the tracking code
+            tracking_code = tracker_data.get('tracking_code')
+            if tracking_code:
+                logger.info("Using tracking code from webhook payload: %s", tracking_code)
+            else:
+                tracking_code = client.tracker.retrieve(tracker_id).tracking_code
+                logger.info("Retrieved tracker with tracking code: %s", tracking_code)
             
             # Find associated shipment using tracking code
             # Note: This requires searching shipments that match this tracking code
             shipments = client.shipment.all(
                 page_size=1,
-                tracking_code=tracker.tracking_code
+                tracking_code=tracking_code
             )
 
             if not shipments or len(shipments.shipments) == 0:
-                logger.error(f"No shipment found with tracking code: {tracker.tracking_code}")
+                logger.error("No shipment found with tracking code: %s", tracking_code)
                 return {"success": False, "error": "No associated shipment found"}
 
             # Get the first matching shipment
             shipment = shipments.shipments[0]
-            logger.info(f"Found associated shipment ID: {shipment.id}")
+            logger.info("Found associated shipment ID: %s", shipment.id)
 
             # Get label information
             if not hasattr(shipment, 'postage_label') or not shipment.postage_label:
-                logger.error(f"No label found for shipment: {shipment.id}")
+                logger.error("No label found for shipment: %s", shipment.id)
                 return {"success": False, "error": "No label found for this shipment"}
 
             # Extract label information
             label_info = {
                 "shipment_id": shipment.id,
                 "account_id": account_id,
-                "tracking_code": tracker.tracking_code,
+                "tracking_code": tracking_code,
                 "label_url": shipment.postage_label.label_url,
                 "label_file_type": shipment.postage_label.label_file_type,
                 "label_date": shipment.postage_label.created_at
             }
-
-            # Print label info to console every time
-            print("\n===== LABEL INFORMATION =====")
-            print(f"Account: {account_id or 'Legacy'}")
-            print(f"Shipment ID: {label_info['shipment_id']}")
-            print(f"Tracking Code: {label_info['tracking_code']}")
-            print(f"Label URL: {label_info['label_url']}")
-            print(f"File Type: {label_info['label_file_type']}")
-            print(f"Created At: {label_info['label_date']}")
-            print("=============================\n")
-
-            logger.info(f"Successfully retrieved label URL: {label_info['label_url']}")
             
-            # Download label content
+            # Summarize the label in one line; formatted only if INFO is enabled
+            logger.info(
+                "Label information - account: %s, shipment ID: %s, tracking code: %s, "
+                "label URL: %s, file type: %s, created at: %s",
+                account_name, label_info['shipment_id'], label_info['tracking_code'],
+                label_info['label_url'], label_info['label_file_type'], label_info['label_date']
+            )
+            
+            # Let the account's printer skip conversion for formats it prints natively
+            accepted_formats = None
+            if account_id:
+                printer_config = get_account_database().get_default_printer_for_account(account_id)
+                if printer_config:
+                    accepted_formats = printer_config.get_accepted_formats()
+            
             logger.info("Downloading label content...")
-            label_content = download_label_content(label_info['label_url'])
+            label_buffer = download_label_content(label_info['label_url'], sink=io.BytesIO())
             
-            if not label_content:
+            if not label_buffer or not label_buffer.getbuffer().nbytes:
                 logger.error("Failed to download label content")
                 return {
                     "success": True, 
@@ -97,53 +152,13 @@ def handle_tracker_event(event_data, account_id=None):
             # Convert label if needed
             logger.info("Processing label for printing...")
             converted_label_data, converted_content = convert_label_if_needed(
-                label_info, label_content
+                label_info, label_buffer, accepted_formats
             )
             
-            # Send to PrintNode for printing
-            print_result = {"success": False, "error": "Printing disabled"}
-            
-            # Use account-specific printing if account_id is provided
-            if account_id:
-                logger.info(f"Sending label to PrintNode for account: {account_id}")
-                print_result = send_to_printnode_for_account(
-                    converted_label_data, converted_content, account_id
-                )
-            else:
-                # Legacy printing behavior
-                logger.info("Using legacy PrintNode configuration...")
-                from app.printnode.printer import send_to_printnode
-                
-                if os.getenv('PRINTNODE_API_KEY'):
-                    print_result = send_to_printnode(converted_label_data, converted_content)
-                else:
-                    print_result = {
-                        "success": False,
-                        "error": "No PrintNode configuration available",
-                        "message": "Label downloaded but no printing configuration found"
-                    }
-            
-            # Display results
-            if print_result.get('success'):
-                print(f"\n===== PRINT JOB SUBMITTED =====")
-                print(f"Account: {account_id or 'Legacy'}")
-                print(f"Job ID: {print_result.get('job_id')}")
-                print(f"Printer ID: {print_result.get('printer_id')}")
-                print(f"Printer Name: {print_result.get('printer_name', 'Unknown')}")
-                print(f"Title: {print_result.get('title')}")
-                print("==============================\n")
-            elif print_result.get('message'):
-                # Printer not configured case
-                print(f"\n===== LABEL READY FOR PRINTING =====")
-                print(f"Account: {account_id or 'Legacy'}")
-                print(f"Status: {print_result.get('message')}")
-                print(f"Action Needed: {print_result.get('error')}")
-                print("===================================\n")
-            else:
-                print(f"\n===== PRINT JOB FAILED =====")
-                print(f"Account: {account_id or 'Legacy'}")
-                print(f"Error: {print_result.get('error')}")
-                print("============================\n")
+            # This already runs on the webhook's event executor, after EasyPost
+            # got its response, so the label is printed right here
+            print_result = _print_label(converted_label_data, converted_content, account_id, account_name)
+            printed = print_result.get('success', False)
 
             return {
                 "success": True, 
@@ -153,9 +168,70 @@ def handle_tracker_event(event_data, account_id=None):
             }
 
         except Exception as api_error:
-            logger.error(f"Error retrieving data from EasyPost API: {str(api_error)}")
+            logger.error("Error retrieving data from EasyPost API: %s", api_error)
             return {"success": False, "error": f"API Error: {str(api_error)}", "account_id": account_id}
+        finally:
+            # Only successful prints are deduplicated; a redelivered event may retry the rest
+            if not printed:
+                _SEEN_TRACKERS.pop(seen_key)
 
     except Exception as e:
-        logger.exception(f"Error handling tracker event: {str(e)}")
+        logger.exception("Error handling tracker event: %s", e)
         return {"success": False, "error": str(e), "account_id": account_id}
+
+def _print_label(label_data, label_content, account_id, account_name):
+    """
+    Send a converted label to PrintNode and log the outcome
+    
+    Runs on the webhook's event executor, after the webhook has already been answered.
+    
+    Args:
+        label_data (dict): Label information (after any conversion)
+        label_content (bytes): Label content to print
+        account_id (str): Account ID, or None to use legacy printing
+        account_name (str): Account name used in log lines
+    
+    Returns:
+        dict: Print job result
+    """
+    print_result = {"success": False, "error": "Printing disabled"}
+
+    try:
+        # Use account-specific printing if account_id is provided
+        if account_id:
+            logger.info("Sending label to PrintNode for account: %s", account_id)
+            print_result = send_to_printnode_for_account(
+                label_data, label_content, account_id
+            )
+        else:
+            # Legacy printing behavior
+            logger.info("Using legacy PrintNode configuration...")
+
+            if Config.PRINTNODE_API_KEY:
+                print_result = send_to_printnode(label_data, label_content)
+            else:
+                print_result = {
+                    "success": False,
+                    "error": "No PrintNode configuration available",
+                    "message": "Label downloaded but no printing configuration found"
+                }
+    except Exception as e:
+        logger.exception("Print job failed with an unexpected error")
+        print_result = {"success": False, "error": str(e)}
+
+    # Report the outcome
+    if print_result.get('success'):
+        outcome = 'submitted'
+    elif print_result.get('message'):
+        # Printer not configured case
+        outcome = 'not_configured'
+    else:
+        outcome = 'failed'
+    
+    level, template = _PRINT_OUTCOME_LOGS[outcome]
+    if logger.isEnabledFor(level):
+        logger.log(level, template, {
+            **_PRINT_OUTCOME_DEFAULTS, **print_result, 'account': account_name
+        })
+
+    return print_result
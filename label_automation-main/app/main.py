@@ -1,8 +1,10 @@
+import logging
 from flask import Flask
 from app.webhook.router import webhook_bp
 from app.management.api import management_bp
 from app.config import Config
-from app.utils.logger import setup_logger
+from app.printnode.multi_printer import Gateway
+from app.utils.logger import setup_logger, start_request_log_writer
 
 def create_app(config_class=Config):
     """Create and configure the Flask application"""
@@ -11,6 +13,14 @@ def create_app(config_class=Config):
     
     # Setup logging
     setup_logger()
+    start_request_log_writer()
+    
+    # The PrintNode library is resolved once at import; report a missing one
+    # at startup rather than on the first label
+    if Gateway is None:
+        logging.getLogger(__name__).warning(
+            "PrintNode API library not found, labels will not be printed. Install with: pip install PrintNodeApi"
+        )
     
     # Register blueprints
     app.register_blueprint(webhook_bp, url_prefix='/webhook')
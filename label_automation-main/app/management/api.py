@@ -1,22 +1,115 @@
+import hmac
+import json
 import logging
 import uuid
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, current_app, request, jsonify
 from functools import wraps
-from app.database.models import AccountDatabase, EasyPostAccount, PrinterConfig
-from app.easypost.multi_client import multi_client_manager
+from app.database.models import EasyPostAccount, PrinterConfig, get_account_database
+from app.easypost.multi_client import get_multi_client_manager
+from app.utils.json_utils import json_response
 
 logger = logging.getLogger(__name__)
 
 management_bp = Blueprint('management', __name__)
 
+@management_bp.record_once
+def _bind_api_key(state):
+    """Store each app's MANAGEMENT_API_KEY as bytes when the blueprint is registered on it"""
+    expected_key = state.app.config.get('MANAGEMENT_API_KEY')
+    state.app.extensions['management_api_key'] = expected_key.encode('utf-8') if expected_key else None
+
+# Request payload schemas: field name -> (accepted types, default); fields
+# whose default is REQUIRED must be present. JSON true/false only match a
+# field that lists bool, so they are never taken as the integers 1/0
+REQUIRED = object()
+
+# Accepted type for on/off fields: true/false, or the integers 1/0 that the
+# API has always taken, which are converted to booleans
+FLAG = object()
+
+CREATE_ACCOUNT_SCHEMA = {
+    'id': (str, None),
+    'name': (str, REQUIRED),
+    'api_key': (str, REQUIRED),
+    'webhook_secret': (str, None),
+    'is_active': (FLAG, True),
+}
+
+# Account fields that can be changed after creation
+UPDATE_ACCOUNT_SCHEMA = {name: spec for name, spec in CREATE_ACCOUNT_SCHEMA.items() if name != 'id'}
+
+CREATE_PRINTER_SCHEMA = {
+    'id': (str, None),
+    'printer_name': (str, REQUIRED),
+    'printnode_api_key': (str, REQUIRED),
+    'printer_id': ((int, str), REQUIRED),
+    'is_default': (FLAG, False),
+    'is_active': (FLAG, True),
+    'accepted_formats': (list, None),
+}
+
+def parse_payload(data, schema, partial=False):
+    """
+    Validate a JSON payload against a schema in one pass
+    
+    Args:
+        data: Decoded request body
+        schema (dict): Field name -> (accepted types, default)
+        partial (bool): Only validate and return the fields present in data,
+            as for an update
+        
+    Returns:
+        tuple: (fields, error) - fields holds every schema field (or, if partial,
+               every field given) with defaults filled in; error is a message
+               if validation failed, else None
+    """
+    if not isinstance(data, dict):
+        data = {}
+    
+    fields = {}
+    missing = []
+    for name, (types, default) in schema.items():
+        if partial and name not in data:
+            continue
+        
+        value = data.get(name)
+        if value is None:
+            if default is REQUIRED:
+                missing.append(name)
+            fields[name] = None if default is REQUIRED else default
+        elif types is FLAG:
+            if isinstance(value, bool):
+                fields[name] = value
+            elif isinstance(value, int) and value in (0, 1):
+                fields[name] = bool(value)
+            else:
+                return None, f"Invalid type for field: {name}"
+        elif isinstance(value, bool) and not _accepts_bool(types):
+            return None, f"Invalid type for field: {name}"
+        elif not isinstance(value, types):
+            return None, f"Invalid type for field: {name}"
+        else:
+            fields[name] = value
+    
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+    return fields, None
+
+def _accepts_bool(types):
+    """Whether a schema's accepted types include bool itself, not just int"""
+    return bool in types if isinstance(types, tuple) else types is bool
+
 def require_api_key(f):
     """Decorator to require API key authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         api_key = request.headers.get('X-API-Key')
-        expected_key = current_app.config.get('MANAGEMENT_API_KEY')
+        expected_api_key = current_app.extensions.get('management_api_key')
         
-        if not api_key or api_key != expected_key:
+        # Constant-time comparison so response timing doesn't leak the key
+        if not api_key or not expected_api_key or not hmac.compare_digest(
+            api_key.encode('utf-8'), expected_api_key
+        ):
             return jsonify({'error': 'Invalid API key'}), 401
         
         return f(*args, **kwargs)
@@ -32,9 +125,9 @@ def management_health():
 def export_config():
     """Export current configuration"""
     try:
-        db = AccountDatabase()
+        db = get_account_database()
         config = db.export_config()
-        return jsonify(config), 200
+        return json_response(config)
     except Exception as e:
         logger.error(f"Error exporting config: {e}")
         return jsonify({'error': str(e)}), 500
@@ -48,13 +141,14 @@ def import_config():
         if not config_data:
             return jsonify({'error': 'No configuration data provided'}), 400
         
-        db = AccountDatabase()
+        db = get_account_database()
         success = db.import_config(config_data)
         
         if success:
             # Refresh client cache
-            for account in config_data.get('accounts', []):
-                multi_client_manager.refresh_client(account['id'])
+            get_multi_client_manager().refresh_clients(
+                account['id'] for account in config_data.get('accounts', [])
+            )
             
             return jsonify({'message': 'Configuration imported successfully'}), 200
         else:
@@ -69,15 +163,15 @@ def import_config():
 def list_accounts():
     """List all EasyPost accounts"""
     try:
-        db = AccountDatabase()
+        db = get_account_database()
         accounts = db.get_all_easypost_accounts()
-        return jsonify([{
+        return json_response([{
             'id': acc.id,
             'name': acc.name,
             'is_active': acc.is_active,
             'created_at': acc.created_at,
             'updated_at': acc.updated_at
-        } for acc in accounts]), 200
+        } for acc in accounts])
     except Exception as e:
         logger.error(f"Error listing accounts: {e}")
         return jsonify({'error': str(e)}), 500
@@ -87,20 +181,14 @@ def list_accounts():
 def create_account():
     """Create new EasyPost account"""
     try:
-        data = request.json
-        if not data or not all(k in data for k in ['name', 'api_key']):
-            return jsonify({'error': 'Missing required fields: name, api_key'}), 400
+        fields, error = parse_payload(request.get_json(silent=True), CREATE_ACCOUNT_SCHEMA)
+        if error:
+            return jsonify({'error': error}), 400
         
-        account_id = data.get('id', str(uuid.uuid4()))
-        account = EasyPostAccount(
-            id=account_id,
-            name=data['name'],
-            api_key=data['api_key'],
-            webhook_secret=data.get('webhook_secret'),
-            is_active=data.get('is_active', True)
-        )
+        account_id = fields.pop('id') or str(uuid.uuid4())
+        account = EasyPostAccount(id=account_id, **fields)
         
-        db = AccountDatabase()
+        db = get_account_database()
         success = db.add_easypost_account(account)
         
         if success:
@@ -117,31 +205,29 @@ def create_account():
 def update_account(account_id):
     """Update EasyPost account"""
     try:
-        data = request.json
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        db = AccountDatabase()
+        fields, error = parse_payload(data, UPDATE_ACCOUNT_SCHEMA, partial=True)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        db = get_account_database()
         account = db.get_easypost_account(account_id)
         
         if not account:
             return jsonify({'error': 'Account not found'}), 404
         
-        # Update fields
-        if 'name' in data:
-            account.name = data['name']
-        if 'api_key' in data:
-            account.api_key = data['api_key']
-        if 'webhook_secret' in data:
-            account.webhook_secret = data['webhook_secret']
-        if 'is_active' in data:
-            account.is_active = data['is_active']
+        # Update the fields that were given
+        for name, value in fields.items():
+            setattr(account, name, value)
         
         success = db.update_easypost_account(account)
         
         if success:
             # Refresh client cache
-            multi_client_manager.refresh_client(account_id)
+            get_multi_client_manager().refresh_client(account_id)
             return jsonify({'message': 'Account updated successfully'}), 200
         else:
             return jsonify({'error': 'Failed to update account'}), 500
@@ -155,12 +241,12 @@ def update_account(account_id):
 def delete_account(account_id):
     """Delete EasyPost account"""
     try:
-        db = AccountDatabase()
+        db = get_account_database()
         success = db.delete_easypost_account(account_id)
         
         if success:
             # Refresh client cache
-            multi_client_manager.refresh_client(account_id)
+            get_multi_client_manager().refresh_client(account_id)
             return jsonify({'message': 'Account deleted successfully'}), 200
         else:
             return jsonify({'error': 'Account not found'}), 404
@@ -174,17 +260,18 @@ def delete_account(account_id):
 def list_printers(account_id):
     """List printers for an account"""
     try:
-        db = AccountDatabase()
+        db = get_account_database()
         printers = db.get_printers_for_account(account_id)
-        return jsonify([{
+        return json_response([{
             'id': p.id,
             'printer_name': p.printer_name,
             'printer_id': p.printer_id,
             'is_default': p.is_default,
             'is_active': p.is_active,
+            'accepted_formats': sorted(p.get_accepted_formats() or ()),
             'created_at': p.created_at,
             'updated_at': p.updated_at
-        } for p in printers]), 200
+        } for p in printers])
     except Exception as e:
         logger.error(f"Error listing printers: {e}")
         return jsonify({'error': str(e)}), 500
@@ -194,22 +281,23 @@ def list_printers(account_id):
 def create_printer(account_id):
     """Create new printer configuration"""
     try:
-        data = request.json
-        if not data or not all(k in data for k in ['printer_name', 'printnode_api_key', 'printer_id']):
-            return jsonify({'error': 'Missing required fields: printer_name, printnode_api_key, printer_id'}), 400
+        fields, error = parse_payload(request.get_json(silent=True), CREATE_PRINTER_SCHEMA)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        accepted_formats = fields.pop('accepted_formats')
+        if accepted_formats is not None and not all(isinstance(f, str) for f in accepted_formats):
+            return jsonify({'error': 'accepted_formats must be a list of format names'}), 400
         
-        printer_config_id = data.get('id', str(uuid.uuid4()))
+        printer_config_id = fields.pop('id') or str(uuid.uuid4())
         printer = PrinterConfig(
             id=printer_config_id,
             account_id=account_id,
-            printer_name=data['printer_name'],
-            printnode_api_key=data['printnode_api_key'],
-            printer_id=data['printer_id'],
-            is_default=data.get('is_default', False),
-            is_active=data.get('is_active', True)
+            accepted_formats=json.dumps(accepted_formats) if accepted_formats else None,
+            **fields
         )
         
-        db = AccountDatabase()
+        db = get_account_database()
         success = db.add_printer_config(printer)
         
         if success:
@@ -228,8 +316,9 @@ def restart_service():
     try:
         # In a real deployment, this would restart the service
         # For now, just refresh all client connections
-        for account in AccountDatabase().get_all_easypost_accounts():
-            multi_client_manager.refresh_client(account.id)
+        get_multi_client_manager().refresh_clients(
+            account.id for account in get_account_database().get_all_easypost_accounts()
+        )
         
         return jsonify({'message': 'Service restarted successfully'}), 200
     except Exception as e:
@@ -241,25 +330,20 @@ def restart_service():
 def get_status():
     """Get system status"""
     try:
-        db = AccountDatabase()
-        accounts = db.get_all_easypost_accounts()
+        accounts = get_account_database().get_accounts_with_printer_counts()
         
         status = {
             'accounts_count': len(accounts),
-            'accounts': []
+            'accounts': [{
+                'id': account['id'],
+                'name': account['name'],
+                'is_active': account['is_active'],
+                'printers_count': account['printers_count'],
+                'webhook_url': f"/webhook/easypost/{account['id']}"
+            } for account in accounts]
         }
         
-        for account in accounts:
-            printers = db.get_printers_for_account(account.id)
-            status['accounts'].append({
-                'id': account.id,
-                'name': account.name,
-                'is_active': account.is_active,
-                'printers_count': len(printers),
-                'webhook_url': f"/webhook/easypost/{account.id}"
-            })
-        
-        return jsonify(status), 200
+        return json_response(status)
     except Exception as e:
         logger.error(f"Error getting status: {e}")
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
@@ -0,0 +1,195 @@
+import io
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from app.config import Config
+from app.printnode.jobs import print_job
+from app.utils.circuit_breaker import CircuitBreaker
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PDF_MERGE_AVAILABLE = True
+except ImportError:
+    PDF_MERGE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Printers whose last few jobs failed are skipped for a while instead of
+# sending PrintNode requests that are bound to fail again; each PrintNode
+# request counts once, however many labels it carried
+printer_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+# Printer-language streams that print correctly when simply concatenated
+RAW_BATCH_FORMATS = frozenset({'zpl', 'epl'})
+
+class _PendingBatch:
+    """Labels waiting to be sent to one printer as a single job"""
+
+    def __init__(self, client, printer_id, file_type):
+        self.client = client
+        self.printer_id = printer_id
+        self.file_type = file_type
+        self.labels = []
+        self.responses = None
+        self.error = None
+        self.done = threading.Event()
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+# Submissions waiting for each printer, oldest first; the one at the front is
+# being sent. Jobs for a printer go to PrintNode one at a time in the order
+# they were ready, and a printer's queue is dropped once it empties, so only
+# printers with submissions in flight are kept. A submission gives up after
+# Config.PRINTER_WAIT_TIMEOUT seconds in the queue, so a printer whose jobs
+# hang can't tie up every webhook event worker and hold up other printers
+_printer_queues = {}
+
+def submit_print_job(client, api_key, printer_id, file_type, title, content):
+    """
+    Submit a label to PrintNode, coalescing it with other labels for the same printer
+
+    Labels for the same (api_key, printer_id, file_type) that arrive within
+    Config.PRINT_BATCH_WINDOW seconds are sent as one print job: ZPL/EPL
+    streams are concatenated, PDFs are merged into one document (needs pypdf).
+    Other formats, or a window of 0, submit the label on its own. Jobs for
+    one printer are submitted one at a time, first come first served.
+
+    Args:
+        client: PrintNode Gateway for api_key
+        api_key (str): PrintNode API key
+        printer_id (int): PrintNode printer ID
+        file_type (str): Lowercase label format
+        title (str): Print job title for this label
+        content (bytes-like): Label content
+
+    Returns:
+        tuple: (PrintNode response, number of labels in the job)
+
+    Raises:
+        TimeoutError: If earlier jobs for the printer took longer than
+            Config.PRINTER_WAIT_TIMEOUT seconds to send
+    """
+    if not _can_batch(file_type):
+        with _printer_turn(api_key, printer_id):
+            return _send(client, printer_id, file_type, title, content), 1
+
+    key = (api_key, printer_id, file_type)
+    with _pending_lock:
+        batch = _pending.get(key)
+        is_leader = batch is None
+        if is_leader:
+            batch = _pending[key] = _PendingBatch(client, printer_id, file_type)
+        index = len(batch.labels)
+        batch.labels.append((title, content))
+
+    # The first label's thread collects the others for one window, then submits
+    if is_leader:
+        time.sleep(Config.PRINT_BATCH_WINDOW)
+        with _pending_lock:
+            del _pending[key]
+        try:
+            with _printer_turn(api_key, printer_id):
+                _flush(batch)
+        except TimeoutError as e:
+            batch.error = e
+            batch.done.set()
+    else:
+        batch.done.wait()
+
+    if batch.error is not None:
+        raise batch.error
+    return batch.responses[index], len(batch.labels)
+
+@contextmanager
+def _printer_turn(api_key, printer_id):
+    """Wait until every earlier submission to this printer is done, then hold the printer"""
+    key = (api_key, printer_id)
+    turn = threading.Event()
+    with _pending_lock:
+        queue = _printer_queues.setdefault(key, deque())
+        queue.append(turn)
+        if len(queue) == 1:
+            turn.set()
+
+    if not turn.wait(Config.PRINTER_WAIT_TIMEOUT):
+        with _pending_lock:
+            # The turn may have come up just as the wait timed out
+            if not turn.is_set():
+                queue.remove(turn)
+                raise TimeoutError(
+                    f"Printer {printer_id} is busy, gave up after waiting "
+                    f"{Config.PRINTER_WAIT_TIMEOUT} seconds for its earlier print jobs"
+                )
+    try:
+        yield
+    finally:
+        with _pending_lock:
+            queue.popleft()
+            if queue:
+                queue[0].set()
+            else:
+                del _printer_queues[key]
+
+def _can_batch(file_type):
+    """Whether labels of this format can be coalesced into one job"""
+    if Config.PRINT_BATCH_WINDOW <= 0:
+        return False
+    return file_type in RAW_BATCH_FORMATS or (file_type == 'pdf' and PDF_MERGE_AVAILABLE)
+
+def _flush(batch):
+    """Send a batch as one print job, falling back to one job per label"""
+    try:
+        count = len(batch.labels)
+        if count == 1:
+            title, content = batch.labels[0]
+            batch.responses = [_send(batch.client, batch.printer_id, batch.file_type, title, content)]
+            return
+
+        try:
+            content = _merge([content for _, content in batch.labels], batch.file_type)
+        except Exception as e:
+            logger.error("Could not combine %d labels into one job, printing separately: %s", count, e)
+            batch.responses = [
+                _send(batch.client, batch.printer_id, batch.file_type, title, content)
+                for title, content in batch.labels
+            ]
+            return
+
+        logger.info("Printing %d %s labels as one job on printer %s", count, batch.file_type, batch.printer_id)
+        response = _send(batch.client, batch.printer_id, batch.file_type,
+                         f"Batch of {count} labels", content)
+        batch.responses = [response] * count
+    except Exception as e:
+        batch.error = e
+    finally:
+        batch.done.set()
+
+def _send(client, printer_id, file_type, title, content):
+    """Submit one PrintNode job, recording how it went on the printer's circuit breaker"""
+    breaker_key = str(printer_id)
+    try:
+        response = print_job(client, printer_id, file_type, title, content)
+    except Exception:
+        printer_breaker.record_failure(breaker_key)
+        raise
+
+    if response and hasattr(response, 'id'):
+        printer_breaker.record_success(breaker_key)
+    else:
+        printer_breaker.record_failure(breaker_key)
+    return response
+
+def _merge(contents, file_type):
+    """Combine label contents into one printable document"""
+    if file_type in RAW_BATCH_FORMATS:
+        return b''.join(contents)
+
+    writer = PdfWriter()
+    for content in contents:
+        writer.append(PdfReader(io.BytesIO(content)))
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getbuffer()
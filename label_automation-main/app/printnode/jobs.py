@@ -0,0 +1,41 @@
+import base64
+
+# PrintNode job type for each label format; anything other than a PDF
+# (including images a printer accepts natively) is sent raw
+JOB_TYPES = {
+    'pdf': 'pdf',
+    'zpl': 'raw',
+    'epl': 'raw',
+}
+
+PRINT_OPTIONS = {
+    "paper": "4x6",  # Common shipping label size
+    "color": False
+}
+
+def label_file_type(label_data):
+    """Lowercase label format of a label, defaulting to PDF"""
+    return (label_data.get('label_file_type') or 'pdf').lower()
+
+def print_job(client, printer_id, file_type, title, content):
+    """
+    Submit one label document to PrintNode as a single print job
+
+    Args:
+        client: PrintNode Gateway
+        printer_id (int): PrintNode printer ID
+        file_type (str): Lowercase label format
+        title (str): Print job title
+        content (bytes-like): Label content
+
+    Returns:
+        PrintNode response for the created job
+    """
+    # According to PrintNode docs, use PrintJob() method, not printjob()
+    return client.PrintJob(
+        printer=printer_id,
+        title=title,
+        job_type=JOB_TYPES.get(file_type, 'raw'),
+        base64=base64.b64encode(content).decode('ascii'),
+        options=PRINT_OPTIONS
+    )
@@ -1,24 +1,68 @@
 import logging
 import os
-import base64
+import threading
 from typing import Optional
-from app.database.models import AccountDatabase, PrinterConfig
+from app.database.models import PrinterConfig, get_account_database
+from app.printnode.batch import printer_breaker, submit_print_job
+from app.printnode.jobs import label_file_type
+from app.utils.cache import TTLCache
+
+try:
+    from PrintNodeApi import Gateway
+except ImportError:
+    try:
+        from printnodeapi import Gateway
+    except ImportError:
+        Gateway = None
 
 logger = logging.getLogger(__name__)
 
+# One Gateway per PrintNode API key, reused across print jobs
+_gateway_cache = {}
+_gateway_lock = threading.Lock()
+
+# Printer listings per PrintNode API key, kept briefly so printer
+# checks don't cost a PrintNode round-trip on every label
+_printers_cache = TTLCache(maxsize=256, ttl=30)
+
 def get_printnode_client(api_key: str):
     """Get configured PrintNode client with specific API key"""
-    try:
-        from PrintNodeApi import Gateway
-    except ImportError:
-        try:
-            from printnodeapi import Gateway
-        except ImportError:
-            raise ImportError("PrintNode API library not found. Install with: pip install PrintNodeApi")
+    if Gateway is None:
+        raise ImportError("PrintNode API library not found. Install with: pip install PrintNodeApi")
     
     if not api_key:
         raise ValueError("PrintNode API key is required")
-    return Gateway(apikey=api_key)
+    
+    client = _gateway_cache.get(api_key)
+    if client is None:
+        with _gateway_lock:
+            client = _gateway_cache.get(api_key)
+            if client is None:
+                client = _gateway_cache[api_key] = Gateway(apikey=api_key)
+    return client
+
+def get_printer_map(client, api_key: str):
+    """
+    Get the printers on a PrintNode account keyed by str(id)
+    
+    The listing is fetched at most every 30 seconds per API key, and each
+    printer is normalized to a dict with at least 'id', 'name' and 'state'.
+    """
+    printer_map = _printers_cache.get(api_key)
+    if printer_map is None:
+        printer_map = {str(printer['id']): printer for printer in map(_normalize_printer, client.printers())}
+        _printers_cache[api_key] = printer_map
+    return printer_map
+
+def _normalize_printer(printer):
+    """Convert a printer in PrintNode's tuple format to the dict format"""
+    if isinstance(printer, dict):
+        return printer
+    return {
+        'id': printer[0],
+        'name': printer[1] if len(printer) > 1 else 'Unknown',
+        'state': printer[2] if len(printer) > 2 else 'unknown'
+    }
 
 def send_to_printnode_for_account(label_data, label_content, account_id):
     """
@@ -26,7 +70,7 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
     
     Args:
         label_data (dict): Label metadata
-        label_content (bytes): Raw label file content
+        label_content (bytes-like): Raw label file content (bytes, bytearray or memoryview)
         account_id (str): EasyPost account ID
         
     Returns:
@@ -36,7 +80,7 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
         logger.info(f"Attempting to send label to PrintNode for account: {account_id}")
         
         # Get printer configuration for account
-        db = AccountDatabase()
+        db = get_account_database()
         printer_config = db.get_default_printer_for_account(account_id)
         
         if not printer_config:
@@ -54,18 +98,8 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
         
         # Verify printer exists and is online
         try:
-            printers = client.printers()
-            target_printer = None
-            
-            for printer in printers:
-                if isinstance(printer, dict):
-                    if str(printer.get('id')) == str(printer_config.printer_id):
-                        target_printer = printer
-                        break
-                else:
-                    if str(printer[0]) == str(printer_config.printer_id):
-                        target_printer = printer
-                        break
+            printer_map = get_printer_map(client, printer_config.printnode_api_key)
+            target_printer = printer_map.get(str(printer_config.printer_id))
             
             if not target_printer:
                 logger.error(f"Printer {printer_config.printer_id} not found on PrintNode account")
@@ -74,15 +108,9 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
                     "error": f"Printer {printer_config.printer_id} ({printer_config.printer_name}) not found"
                 }
             
-            # Check if printer is online (for dict format)
-            if isinstance(target_printer, dict):
-                if target_printer.get('state') != 'online':
-                    logger.warning(f"Printer {printer_config.printer_id} is not online (state: {target_printer.get('state', 'unknown')})")
-            else:
-                # For tuple format, state is usually in index 2
-                state = target_printer[2] if len(target_printer) > 2 else 'unknown'
-                if state != 'online':
-                    logger.warning(f"Printer {printer_config.printer_id} is not online (state: {state})")
+            # Check if printer is online
+            if target_printer.get('state') != 'online':
+                logger.warning(f"Printer {printer_config.printer_id} is not online (state: {target_printer.get('state', 'unknown')})")
                     
         except Exception as e:
             logger.error(f"Error verifying printer {printer_config.printer_id}: {str(e)}")
@@ -91,24 +119,21 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
         # Prepare print job
         job_title = f"Shipping Label - {label_data.get('tracking_code', 'Unknown')} ({account_id})"
         
-        # Convert content to base64 for PrintNode
-        content_base64 = base64.b64encode(label_content).decode('utf-8')
-        
-        # Determine content type based on file type
-        content_type = "pdf_base64"  # Default to PDF
-        if label_data.get('label_file_type', '').lower() in ['zpl', 'epl']:
-            content_type = "raw_base64"
-        
-        # Submit print job using PrintNode's correct method
-        response = client.PrintJob(
-            printer=int(printer_config.printer_id),
-            title=job_title,
-            job_type="pdf" if content_type == "pdf_base64" else "raw",
-            base64=content_base64,
-            options={
-                "paper": "4x6",  # Common shipping label size 
-                "color": False
+        breaker_key = str(printer_config.printer_id)
+        if not printer_breaker.allow(breaker_key):
+            logger.error("Skipping print job for printer %s: its recent print jobs failed", printer_config.printer_id)
+            return {
+                "success": False,
+                "error": f"Printer {printer_config.printer_id} is failing, print jobs paused for up to {printer_breaker.reset_timeout} seconds",
+                "account_id": account_id
             }
+        
+        # Submit the print job; labels arriving together for this printer share one job,
+        # and the job's outcome is recorded on the circuit breaker as it is submitted
+        file_type = label_file_type(label_data)
+        response, batch_size = submit_print_job(
+            client, printer_config.printnode_api_key, int(printer_config.printer_id),
+            file_type, job_title, label_content
         )
         
         if response and hasattr(response, 'id'):
@@ -120,7 +145,8 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
                 "printer_id": printer_config.printer_id,
                 "printer_name": printer_config.printer_name,
                 "account_id": account_id,
-                "title": job_title
+                "title": job_title,
+                "batch_size": batch_size
             }
         else:
             logger.error("Failed to submit print job - no valid response")
@@ -133,30 +159,17 @@ def send_to_printnode_for_account(label_data, label_content, account_id):
 def get_printer_info_for_account(account_id: str):
     """Get printer information for a specific account"""
     try:
-        db = AccountDatabase()
+        db = get_account_database()
         printers = db.get_printers_for_account(account_id)
         
         result = []
         for printer_config in printers:
             try:
                 client = get_printnode_client(printer_config.printnode_api_key)
-                printnode_printers = client.printers()
+                printer_map = get_printer_map(client, printer_config.printnode_api_key)
                 
                 # Find this printer in PrintNode
-                printer_status = None
-                for pn_printer in printnode_printers:
-                    if isinstance(pn_printer, dict):
-                        if str(pn_printer.get('id')) == str(printer_config.printer_id):
-                            printer_status = pn_printer
-                            break
-                    else:
-                        if str(pn_printer[0]) == str(printer_config.printer_id):
-                            printer_status = {
-                                'id': pn_printer[0],
-                                'name': pn_printer[1] if len(pn_printer) > 1 else 'Unknown',
-                                'state': pn_printer[2] if len(pn_printer) > 2 else 'unknown'
-                            }
-                            break
+                printer_status = printer_map.get(str(printer_config.printer_id))
                 
                 result.append({
                     "config": printer_config,
@@ -1,57 +1,48 @@
 import logging
-import os
-import base64
+from app.config import Config
+from app.printnode import multi_printer
+from app.printnode.batch import submit_print_job
+from app.printnode.jobs import label_file_type
 
 logger = logging.getLogger(__name__)
 
 def get_printnode_client():
     """Get configured PrintNode client"""
-    try:
-        from PrintNodeApi import Gateway
-    except ImportError:
-        try:
-            from printnodeapi import Gateway
-        except ImportError:
-            raise ImportError("PrintNode API library not found. Install with: pip install PrintNodeApi")
-    
-    api_key = os.getenv('PRINTNODE_API_KEY')
+    api_key = Config.PRINTNODE_API_KEY
     if not api_key:
         raise ValueError("PRINTNODE_API_KEY environment variable is required")
-    return Gateway(apikey=api_key)
+    return multi_printer.get_printnode_client(api_key)
 
-def get_printer_info():
-    """Get information about the configured printer"""
+def get_printer_map(client):
+    """Get the printers on the legacy PrintNode account keyed by str(id), cached briefly"""
+    return multi_printer.get_printer_map(client, Config.PRINTNODE_API_KEY)
+
+def get_printer_info(printer_map=None):
+    """
+    Get information about the configured printer
+    
+    Args:
+        printer_map (dict): Optional printer listing from get_printer_map, to
+            reuse instead of looking it up again
+    """
     try:
-        client = get_printnode_client()
-        printer_id = os.getenv('PRINTNODE_PRINTER_ID')
+        if printer_map is None:
+            printer_map = get_printer_map(get_printnode_client())
+        printer_id = Config.PRINTNODE_PRINTER_ID
         
         if not printer_id or printer_id == 'your-printer-id':
             # List all available printers if no specific printer configured
-            printers = client.printers()
+            printers = list(printer_map.values())
             logger.info("Available printers:")
             for printer in printers:
-                # Handle both dict and tuple formats from PrintNode API
-                if isinstance(printer, dict):
-                    logger.info(f"  ID: {printer['id']}, Name: {printer['name']}, State: {printer['state']}")
-                else:
-                    # If it's a tuple or list, access by index
-                    logger.info(f"  ID: {printer[0]}, Name: {printer[1]}, State: {printer[2] if len(printer) > 2 else 'unknown'}")
+                logger.info(f"  ID: {printer['id']}, Name: {printer['name']}, State: {printer.get('state', 'unknown')}")
             return printers
         else:
-            # Get specific printer from the list
-            printers = client.printers()
-            for printer in printers:
-                # Handle both dict and tuple formats
-                if isinstance(printer, dict):
-                    if str(printer.get('id')) == str(printer_id):
-                        logger.info(f"Configured printer: {printer['name']} (ID: {printer_id})")
-                        return printer
-                else:
-                    # If it's a tuple or list
-                    if str(printer[0]) == str(printer_id):
-                        name = printer[1] if len(printer) > 1 else 'Unknown'
-                        logger.info(f"Configured printer: {name} (ID: {printer_id})")
-                        return printer
+            # Get specific printer from the listing
+            printer = printer_map.get(str(printer_id))
+            if printer:
+                logger.info(f"Configured printer: {printer['name']} (ID: {printer_id})")
+                return printer
             
             logger.warning(f"Printer with ID {printer_id} not found")
             return None
@@ -66,7 +57,7 @@ def send_to_printnode(label_data, label_content):
     
     Args:
         label_data (dict): Label metadata
-        label_content (bytes): Raw label file content
+        label_content (bytes-like): Raw label file content (bytes, bytearray or memoryview)
         
     Returns:
         dict: Print job result with job ID or error info
@@ -75,7 +66,7 @@ def send_to_printnode(label_data, label_content):
         logger.info("Attempting to send label to PrintNode")
         
         client = get_printnode_client()
-        printer_id = os.getenv('PRINTNODE_PRINTER_ID')
+        printer_id = Config.PRINTNODE_PRINTER_ID
         
         # Check if printer ID is configured
         if not printer_id or printer_id == 'your-printer-id':
@@ -83,11 +74,11 @@ def send_to_printnode(label_data, label_content):
             
             # List available printers for when they're ready
             try:
-                printers = client.printers()
+                printers = get_printer_map(client)
                 if printers:
                     logger.info("Available printers for future configuration:")
-                    for printer in printers:
-                        logger.info(f"  ID: {printer['id']}, Name: {printer['name']}, State: {printer['state']}")
+                    for printer in printers.values():
+                        logger.info(f"  ID: {printer['id']}, Name: {printer['name']}, State: {printer.get('state', 'unknown')}")
                 else:
                     logger.info("No printers found on PrintNode account")
             except:
@@ -101,59 +92,37 @@ def send_to_printnode(label_data, label_content):
         
         # Verify printer exists and is online
         try:
-            printers = client.printers()
-            target_printer = None
-            
-            for printer in printers:
-                if isinstance(printer, dict):
-                    if str(printer.get('id')) == str(printer_id):
-                        target_printer = printer
-                        break
-                else:
-                    if str(printer[0]) == str(printer_id):
-                        target_printer = printer
-                        break
+            target_printer = get_printer_map(client).get(str(printer_id))
             
             if not target_printer:
                 logger.error(f"Printer {printer_id} not found on account")
                 return {"success": False, "error": f"Printer {printer_id} not found"}
             
-            # Check if printer is online (for dict format)
-            if isinstance(target_printer, dict):
-                if target_printer.get('state') != 'online':
-                    logger.warning(f"Printer {printer_id} is not online (state: {target_printer.get('state', 'unknown')})")
-            else:
-                # For tuple format, state is usually in index 2
-                state = target_printer[2] if len(target_printer) > 2 else 'unknown'
-                if state != 'online':
-                    logger.warning(f"Printer {printer_id} is not online (state: {state})")
+            # Check if printer is online
+            if target_printer.get('state') != 'online':
+                logger.warning(f"Printer {printer_id} is not online (state: {target_printer.get('state', 'unknown')})")
                     
         except Exception as e:
             logger.error(f"Error verifying printer {printer_id}: {str(e)}")
             return {"success": False, "error": f"Error verifying printer: {str(e)}"}
         
+        breaker = multi_printer.printer_breaker
+        breaker_key = str(printer_id)
+        if not breaker.allow(breaker_key):
+            logger.error("Skipping print job for printer %s: its recent print jobs failed", printer_id)
+            return {
+                "success": False,
+                "error": f"Printer {printer_id} is failing, print jobs paused for up to {breaker.reset_timeout} seconds"
+            }
+        
         # Prepare print job
         job_title = f"Shipping Label - {label_data.get('tracking_code', 'Unknown')}"
         
-        # Convert content to base64 for PrintNode
-        content_base64 = base64.b64encode(label_content).decode('utf-8')
-        
-        # Determine content type based on file type
-        content_type = "pdf_base64"  # Default to PDF
-        if label_data.get('label_file_type', '').lower() in ['zpl', 'epl']:
-            content_type = "raw_base64"
-        
-        # Submit print job using PrintNode's correct method
-        # According to PrintNode docs, use PrintJob() method, not printjob()
-        response = client.PrintJob(
-            printer=int(printer_id),
-            title=job_title,
-            job_type="pdf" if content_type == "pdf_base64" else "raw",
-            base64=content_base64,
-            options={
-                "paper": "4x6",  # Common shipping label size 
-                "color": False
-            }
+        # Submit the print job; labels arriving together for this printer share one job,
+        # and the job's outcome is recorded on the circuit breaker as it is submitted
+        response, batch_size = submit_print_job(
+            client, Config.PRINTNODE_API_KEY, int(printer_id),
+            label_file_type(label_data), job_title, label_content
         )
         
         if response and hasattr(response, 'id'):
@@ -163,7 +132,8 @@ def send_to_printnode(label_data, label_content):
                 "success": True, 
                 "job_id": job_id,
                 "printer_id": printer_id,
-                "title": job_title
+                "title": job_title,
+                "batch_size": batch_size
             }
         else:
             logger.error("Failed to submit print job - no valid response")
@@ -0,0 +1,47 @@
+import threading
+import time
+
+class CircuitBreaker:
+    """
+    Stop calling a failing service for a while after repeated errors
+
+    Once a key has failure_threshold failures in a row, calls for it are
+    refused for reset_timeout seconds. After that a single call is let
+    through; a success closes the circuit, another failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """Return True if a call for key may go ahead"""
+        with self._lock:
+            opened_at = self._opened_at.get(key)
+            if opened_at is None:
+                return True
+
+            now = time.monotonic()
+            if now - opened_at < self.reset_timeout:
+                return False
+
+            # Let this call probe the service; others keep failing fast meanwhile
+            self._opened_at[key] = now
+            return True
+
+    def record_success(self, key):
+        """Close the circuit for key"""
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+
+    def record_failure(self, key):
+        """Count a failure for key, opening the circuit at the threshold"""
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures >= self.failure_threshold:
+                self._opened_at[key] = time.monotonic()
\ No newline at end of file
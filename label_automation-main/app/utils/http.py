@@ -0,0 +1,54 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def create_session(pool_connections=8, pool_maxsize=32, retries=3, backoff_factor=0.2):
+    """
+    Create a requests Session that keeps HTTPS connections alive between calls
+    
+    Args:
+        pool_connections (int): Number of hosts to keep connection pools for
+        pool_maxsize (int): Connections kept per host
+        retries (int): Retries on connection errors, and on 429/5xx responses to idempotent requests
+        backoff_factor (float): Backoff multiplier between retries
+        
+    Returns:
+        requests.Session: Session with a pooled, retrying HTTPS adapter
+    """
+    # Connection failures are retried for any request, since nothing was sent.
+    # Read errors and 429/5xx responses are only retried for idempotent methods,
+    # so a POST that may have been processed is never repeated. When retries run
+    # out the last response is returned as-is rather than raised as a RetryError.
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False
+        )
+    ))
+    return session
+
+# Process-wide session, created on first use
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+def get_shared_session():
+    """
+    Get the process-wide pooled Session shared by label downloads
+    
+    Returns:
+        requests.Session: Shared session with room for many concurrent connections
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = create_session(pool_connections=32, pool_maxsize=64,
+                                                 retries=2, backoff_factor=0.1)
+    return _shared_session
\ No newline at end of file
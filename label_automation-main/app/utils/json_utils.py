@@ -0,0 +1,36 @@
+import json
+from flask import current_app, jsonify
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def parse_json(data):
+    """
+    Parse a JSON document from bytes, using orjson when it is installed
+
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_json_line(obj):
+    """Serialize obj as one line of compact JSON bytes ending in a newline; values JSON can't represent are written with str()"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+
+def json_response(payload, status=200):
+    """
+    Build a JSON response, serialized with orjson when it is installed
+
+    orjson writes the response bytes directly and is several times faster
+    than jsonify on large payloads.
+    """
+    if not ORJSON_AVAILABLE:
+        return jsonify(payload), status
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
\ No newline at end of file
@@ -1,7 +1,16 @@
 import logging
 import os
-import json
+import queue
+import threading
 from datetime import datetime
+from app.utils.json_utils import dump_json_line
+
+WEBHOOK_LOGS_DIR = "webhook_logs"
+
+# Serialized webhook requests waiting to be written: (date, JSON line bytes)
+_log_queue = queue.Queue(maxsize=10000)
+_log_writer_thread = None
+_log_writer_lock = threading.Lock()
 
 def setup_logger():
     """Setup application logging"""
@@ -20,36 +29,84 @@ def save_request_to_file(request_data, account_id=None):
     """
     Save webhook request to file for debugging
     
+    Requests are appended as one JSON line each to a daily file,
+    webhook_logs/YYYYMMDD.ndjson. The payload is serialized here and written
+    by a background thread, so the webhook doesn't wait on disk I/O. Requests
+    are dropped (with a warning) if the writer falls too far behind.
+    
     Args:
         request_data (dict): The request payload
         account_id (str): Optional account ID for organization
     """
     try:
-        # Create logs directory if it doesn't exist
-        logs_dir = "webhook_logs"
-        if not os.path.exists(logs_dir):
-            os.makedirs(logs_dir)
+        start_request_log_writer()
         
-        # Create filename with timestamp and account info
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        account_suffix = f"_{account_id}" if account_id else "_legacy"
-        event_type = request_data.get('description', 'unknown').replace('.', '_')
-        filename = f"{timestamp}{account_suffix}_{event_type}.json"
-        filepath = os.path.join(logs_dir, filename)
+        now = datetime.now()
         
         # Add metadata to the request data
         log_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "account_id": account_id,
             "event_type": request_data.get('description'),
             "payload": request_data
         }
         
-        # Write to file
-        with open(filepath, 'w') as f:
-            json.dump(log_data, f, indent=2, default=str)
-        
-        logging.info(f"Webhook request saved to: {filepath}")
+        _log_queue.put_nowait((now.strftime("%Y%m%d"), dump_json_line(log_data)))
         
+    except queue.Full:
+        logging.warning("Webhook log queue is full, request not saved to file")
     except Exception as e:
-        logging.error(f"Failed to save request to file: {str(e)}")
\ No newline at end of file
+        logging.error(f"Failed to save request to file: {str(e)}")
+
+def start_request_log_writer():
+    """Create the webhook log directory and start its writer thread, once"""
+    global _log_writer_thread
+    if _log_writer_thread is not None:
+        return
+    
+    with _log_writer_lock:
+        if _log_writer_thread is None:
+            os.makedirs(WEBHOOK_LOGS_DIR, exist_ok=True)
+            thread = threading.Thread(target=_write_request_logs, name='webhook-log-writer', daemon=True)
+            thread.start()
+            _log_writer_thread = thread
+
+def _write_request_logs():
+    """Append queued webhook requests to the daily log file, forever"""
+    log_file = None
+    log_date = None
+    try:
+        while True:
+            date, line = _log_queue.get()
+            try:
+                if date != log_date:
+                    _close_log_file(log_file)
+                    log_file = None
+                    filepath = os.path.join(WEBHOOK_LOGS_DIR, f"{date}.ndjson")
+                    log_file = open(filepath, 'ab', buffering=64 * 1024)
+                    log_date = date
+                    logging.info(f"Saving webhook requests to: {filepath}")
+                
+                log_file.write(line)
+                # Only this thread writes, so lines never interleave; flush once
+                # the queue drains so the file stays current between bursts
+                if _log_queue.empty():
+                    log_file.flush()
+            except Exception as e:
+                # Drop the handle after a write error and reopen the file for
+                # the next request, so a failing disk doesn't leak descriptors
+                _close_log_file(log_file)
+                log_file = None
+                log_date = None
+                logging.error(f"Failed to save request to file: {str(e)}")
+    finally:
+        _close_log_file(log_file)
+
+def _close_log_file(log_file):
+    """Close a webhook log file, ignoring errors flushing what it still buffers"""
+    if log_file is None:
+        return
+    try:
+        log_file.close()
+    except OSError as e:
+        logging.error(f"Failed to close webhook log file: {str(e)}")
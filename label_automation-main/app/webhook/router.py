@@ -1,42 +1,56 @@
 import logging
-import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from flask import Blueprint, request, jsonify
+from app.config import Config
+from app.database.models import get_account_database
 from app.handlers.tracker_handler import handle_tracker_event
+from app.utils.json_utils import json_response, parse_json
 from app.utils.logger import save_request_to_file
+from app.webhook.verifier import verify_easypost_signature
 
 logger = logging.getLogger(__name__)
 
 webhook_bp = Blueprint('webhook', __name__)
 
+# tracker.created events are processed here, printing included, so EasyPost
+# gets its response right away; this one bounded pool owns all per-event work
+_EVENT_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='webhook-event')
+
 @webhook_bp.route('/health', methods=['GET'])
 def webhook_health():
     """Webhook blueprint health check"""
     return jsonify({'status': 'healthy', 'service': 'webhook'}), 200
 
-@webhook_bp.route('/easypost', methods=['POST'])
-def easypost_webhook():
-    """
-    Handle incoming EasyPost webhook events (legacy endpoint)
-    """
-    return handle_easypost_webhook(account_id=None)
-
+@webhook_bp.route('/easypost', defaults={'account_id': None}, methods=['POST'])
 @webhook_bp.route('/easypost/<account_id>', methods=['POST'])
-def easypost_webhook_account(account_id):
+def handle_easypost_webhook(account_id):
     """
-    Handle incoming EasyPost webhook events for specific account
-    """
-    return handle_easypost_webhook(account_id=account_id)
-
-def handle_easypost_webhook(account_id=None):
-    """
-    Common webhook handler for EasyPost events
+    Handle incoming EasyPost webhook events
+    
+    /easypost is the legacy endpoint; /easypost/<account_id> serves one account.
     
     Args:
-        account_id (str): Optional account ID for multi-account support
+        account_id (str): Account ID from the URL, None on the legacy endpoint
     """
+    raw_body = request.get_data(cache=False)
+    
+    # Reject forged requests before spending any time parsing them
+    try:
+        webhook_secret = _webhook_secret(account_id)
+    except Exception as e:
+        logger.exception("Could not look up webhook secret (account: %s): %s", account_id or 'legacy', e)
+        return jsonify({'error': 'Could not verify webhook signature', 'account_id': account_id}), 500
+    if webhook_secret:
+        signature = request.headers.get('X-Hmac-Signature', '').removeprefix('hmac-sha256-hex=')
+        if not verify_easypost_signature(signature, raw_body, webhook_secret):
+            logger.warning("Rejected webhook with invalid signature (account: %s)", account_id or 'legacy')
+            return jsonify({'error': 'Invalid signature', 'account_id': account_id}), 401
+    
     # Get the webhook event data
-    payload = request.json
+    try:
+        payload = parse_json(raw_body)
+    except ValueError:
+        payload = None
     
     if not payload:
         logger.error("Empty webhook payload received")
@@ -45,13 +59,12 @@ def handle_easypost_webhook(account_id=None):
     # Add account info to payload for processing
     if account_id:
         payload['account_id'] = account_id
-        logger.info(f"Processing webhook for account: {account_id}")
     
     # Save request to file
     save_request_to_file(payload, account_id)
     
     # Log incoming webhook
-    logger.info(f"Received webhook event: {payload.get('description', 'unknown event')} (account: {account_id or 'legacy'})")
+    logger.info("Received webhook event: %s (account: %s)", payload.get('description', 'unknown event'), account_id or 'legacy')
     
     # Process event based on type
     event_type = payload.get('description')
@@ -62,18 +75,35 @@ def handle_easypost_webhook(account_id=None):
     try:
         # Only process tracker.created events
         if event_type == 'tracker.created':
-            logger.info(f"Processing tracker.created event: {payload.get('id')} (account: {account_id or 'legacy'})")
-            result = handle_tracker_event(payload, account_id)
-            return jsonify(result), 200
+            logger.info("Processing tracker.created event: %s (account: %s)", payload.get('id'), account_id or 'legacy')
+            # Queued in memory only: an event still queued when the process exits is lost
+            future = _EVENT_EXECUTOR.submit(handle_tracker_event, payload, account_id)
+            future.add_done_callback(_log_event_result)
+            return json_response({'success': True, 'queued': True, 'account_id': account_id}, 202)
         else:
             # Log but don't process other event types
-            logger.info(f"Received but not processing event type: {event_type}")
-            return jsonify({
+            logger.info("Received but not processing event type: %s", event_type)
+            return json_response({
                 'success': True, 
                 'message': f'Event type {event_type} acknowledged but not processed',
                 'account_id': account_id
-            }), 200
+            })
 
     except Exception as e:
-        logger.exception(f"Error processing webhook: {str(e)}")
-        return jsonify({'error': f'Webhook processing error: {str(e)}', 'account_id': account_id}), 500
\ No newline at end of file
+        logger.exception("Error processing webhook: %s", e)
+        return jsonify({'error': f'Webhook processing error: {str(e)}', 'account_id': account_id}), 500
+
+def _webhook_secret(account_id):
+    """Signing secret for a webhook endpoint, or None if its requests aren't verified"""
+    if account_id is None:
+        return Config.EASYPOST_WEBHOOK_SECRET
+    account = get_account_database().get_easypost_account(account_id)
+    return account.webhook_secret if account else None
+
+def _log_event_result(future):
+    """Log a queued tracker event whose processing failed"""
+    error = future.exception()
+    if error is not None:
+        logger.error("Tracker event processing raised an unexpected error", exc_info=error)
+    elif not future.result().get('success'):
+        logger.error("Tracker event processing failed: %s", future.result().get('error'))
\ No newline at end of file
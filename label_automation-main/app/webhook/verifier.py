@@ -1,15 +1,20 @@
 import hmac
 import hashlib
 import logging
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Keyed HMAC-SHA256 objects per webhook secret; copying one skips the key setup.
+# Entries expire, so secrets that were rotated out aren't kept around
+_hmac_prototypes = TTLCache(maxsize=256, ttl=300)
+
 def verify_easypost_signature(signature, payload, webhook_secret):
     """
     Verify that the webhook request is from EasyPost using HMAC signature
     
     Args:
-        signature (str): The HMAC signature from the X-Easypost-Signature header
+        signature (str): The hex HMAC signature from the X-Hmac-Signature header
         payload (bytes): The raw request body
         webhook_secret (str): The EasyPost webhook signing secret
         
@@ -22,15 +27,18 @@ def verify_easypost_signature(signature, payload, webhook_secret):
     
     try:
         # Create HMAC-SHA256 signature using webhook secret
-        computed_signature = hmac.new(
-            key=webhook_secret.encode('utf-8'),
-            msg=payload,
-            digestmod=hashlib.sha256
-        ).hexdigest()
+        prototype = _hmac_prototypes.get(webhook_secret)
+        if prototype is None:
+            prototype = hmac.new(key=webhook_secret.encode('utf-8'), digestmod=hashlib.sha256)
+            _hmac_prototypes[webhook_secret] = prototype
+        
+        mac = prototype.copy()
+        mac.update(payload)
+        computed_signature = mac.hexdigest()
         
         # Compare signatures using constant-time comparison
         return hmac.compare_digest(computed_signature, signature)
     
     except Exception as e:
-        logger.exception(f"Error verifying signature: {str(e)}")
+        logger.exception("Error verifying signature: %s", e)
         return False
\ No newline at end of file
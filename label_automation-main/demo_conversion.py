@@ -14,7 +14,7 @@ from PIL import Image, ImageDraw, ImageFont
 # Add current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from convert_label import convert_png_to_pdf, LabelConversionError
+from app.converter.png_pdf import convert_png_to_pdf, LabelConversionError
 from app.converter.label_converter import convert_label_if_needed
 
 def create_realistic_shipping_label(output_path="demo_shipping_label.png"):
@@ -1,6 +1,8 @@
 import os
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
 from datetime import datetime
 
@@ -11,24 +13,26 @@ app.secret_key = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
 RASPBERRY_PI_URL = os.getenv('RASPBERRY_PI_URL', 'http://raspberrypi.local:5000')
 MANAGEMENT_API_KEY = os.getenv('MANAGEMENT_API_KEY', 'change-this-secure-key')
 
+# One session for all management API calls, so the connection to the Pi is
+# kept alive between requests; idempotent requests are retried on gateway errors
+_session = requests.Session()
+_session.headers.update({
+    'X-API-Key': MANAGEMENT_API_KEY,
+    'Content-Type': 'application/json'
+})
+_session.mount('http://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+))
+_session.mount('https://', _session.get_adapter('http://'))
+
 def make_api_request(endpoint, method='GET', data=None):
     """Make request to Raspberry Pi management API"""
     url = f"{RASPBERRY_PI_URL}/manage{endpoint}"
-    headers = {
-        'X-API-Key': MANAGEMENT_API_KEY,
-        'Content-Type': 'application/json'
-    }
     
     try:
-        if method == 'GET':
-            response = requests.get(url, headers=headers, timeout=10)
-        elif method == 'POST':
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-        elif method == 'PUT':
-            response = requests.put(url, headers=headers, json=data, timeout=10)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=headers, timeout=10)
-        
+        response = _session.request(method, url, json=data, timeout=10)
         response.raise_for_status()
         return response.json()
     
@@ -3,10 +3,24 @@
 Installation script for Label Automation System
 """
 
+import hashlib
+import importlib.util
 import subprocess
 import sys
 import os
 
+# Core packages and the module each one installs, to tell which are already present
+CORE_PACKAGES = {
+    "flask": "flask",
+    "easypost": "easypost",
+    "python-dotenv": "dotenv",
+    "requests": "requests",
+    "colorama": "colorama",
+}
+
+# Records which requirements.txt was last installed into which environment
+REQUIREMENTS_STAMP = ".requirements.stamp"
+
 def install_package(package):
     """Install a Python package using pip"""
     try:
@@ -18,31 +32,76 @@ def install_package(package):
         print(f"❌ Failed to install {package}: {e}")
         return False
 
+def install_packages(packages):
+    """Install several Python packages with a single pip run"""
+    try:
+        print(f"📦 Installing {', '.join(packages)}...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *packages])
+        print("✅ All packages installed successfully!")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed to install packages together: {e}")
+        return False
+
+def requirements_fingerprint():
+    """Hash of requirements.txt together with the environment it is installed into"""
+    with open("requirements.txt", "rb") as f:
+        digest = hashlib.blake2b(f.read(), digest_size=16)
+    digest.update(sys.prefix.encode())
+    return digest.hexdigest()
+
 def install_from_requirements():
-    """Install packages from requirements.txt"""
+    """Install packages from requirements.txt, skipping pip if they are already installed"""
     if os.path.exists("requirements.txt"):
+        fingerprint = requirements_fingerprint()
         try:
-            print("📦 Installing from requirements.txt...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-            print("✅ All requirements installed successfully!")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install from requirements.txt: {e}")
+            with open(REQUIREMENTS_STAMP) as f:
+                if f.read().strip() == fingerprint:
+                    print(f"✅ Requirements already installed (delete {REQUIREMENTS_STAMP} to reinstall)")
+                    return True
+        except OSError:
+            pass
+        
+        print("📦 Installing from requirements.txt...")
+        # pip's output is relayed line by line as it runs; without the
+        # progress bar it is plain lines rather than constant redraws
+        with subprocess.Popen(
+            [sys.executable, "-m", "pip", "install", "-r", "requirements.txt", "--progress-bar=off"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+        ) as proc:
+            for line in proc.stdout:
+                print(line, end='')
+            returncode = proc.wait()
+        
+        if returncode != 0:
+            print(f"❌ Failed to install from requirements.txt: pip exited with status {returncode}")
             return False
+        print("✅ All requirements installed successfully!")
+        
+        try:
+            with open(REQUIREMENTS_STAMP, "w") as f:
+                f.write(fingerprint)
+        except OSError:
+            pass
+        return True
     else:
         print("❌ requirements.txt not found")
         return False
 
 def install_core_packages():
-    """Install core packages manually"""
-    packages = [
-        "flask",
-        "easypost",
-        "python-dotenv",
-        "requests",
-        "colorama",
-    ]
+    """Install core packages manually, skipping those that can already be imported"""
+    packages = [package for package, module in CORE_PACKAGES.items()
+                if importlib.util.find_spec(module) is None]
+    if not packages:
+        print("✅ All core packages are already installed")
+        return True
+    
+    # One pip run resolves and downloads everything at once; packages are
+    # only retried one by one if that fails, to install all that can be
+    if install_packages(packages):
+        return True
     
+    print("\n⚠️  Retrying packages one at a time...")
     success_count = 0
     for package in packages:
         if install_package(package):
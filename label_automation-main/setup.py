@@ -3,12 +3,20 @@
 Setup script for Label Automation System
 """
 
+import argparse
+import io
 import os
 import sys
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds to wait for PrintNode before the connection check gives up
+PRINTNODE_TIMEOUT = 10
 
 def check_environment():
     """Check if all required environment variables are set"""
+    # Imported here so 'help' and unknown commands don't pay for it
+    from dotenv import load_dotenv
     load_dotenv()
     
     required_vars = [
@@ -20,9 +28,10 @@ def check_environment():
         'PRINTNODE_PRINTER_ID'
     ]
     
+    env = os.environ
     missing_vars = []
     for var in required_vars:
-        if not os.getenv(var):
+        if not env.get(var):
             missing_vars.append(var)
     
     if missing_vars:
@@ -37,7 +46,8 @@ def check_environment():
     # Check optional variables
     missing_optional = []
     for var in optional_vars:
-        if not os.getenv(var) or os.getenv(var) == 'your-printer-id':
+        value = env.get(var)
+        if not value or value == 'your-printer-id':
             missing_optional.append(var)
     
     if missing_optional:
@@ -64,53 +74,61 @@ def test_easypost_connection():
         print(f"❌ EasyPost connection failed: {str(e)}")
         return False
 
-def test_printnode_connection():
-    """Test PrintNode API connection and list printers"""
+def _call_with_timeout(func, timeout):
+    """Call func in a daemon thread, raising TimeoutError if it takes longer than timeout seconds"""
+    result = {}
+    
+    def run():
+        try:
+            result['value'] = func()
+        except Exception as e:
+            result['error'] = e
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"no response after {timeout:g} seconds")
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+def test_printnode_connection(quick=False, timeout=PRINTNODE_TIMEOUT):
+    """Test PrintNode API connection and, unless quick, list printers"""
     try:
-        from app.printnode.printer import get_printnode_client, get_printer_info
+        from app.printnode.printer import get_printnode_client, get_printer_info, get_printer_map
         
         print("🔄 Testing PrintNode connection...")
         client = get_printnode_client()
         
-        # Test connection by getting printers (which validates the API key)
+        # Test connection by getting printers (which validates the API key);
+        # the listing is passed to get_printer_info below rather than fetched again
         try:
-            printers = client.printers()
+            printers = _call_with_timeout(lambda: get_printer_map(client), timeout)
             print(f"✅ PrintNode connected successfully! Found {len(printers)} printers on account.")
         except Exception as e:
             print(f"❌ PrintNode API test failed: {str(e)}")
             return False
         
+        if quick:
+            return True
+        
         # List printers
         print("\n📋 Available printers:")
-        printer_info = get_printer_info()
+        printer_info = get_printer_info(printers)
         
+        # Printers from get_printer_map are all dicts with 'id', 'name' and 'state'
         if isinstance(printer_info, list):
             if len(printer_info) == 0:
                 print("   No printers found")
             else:
                 for printer in printer_info:
-                    # Handle both dict and tuple formats from PrintNode API
-                    if isinstance(printer, dict):
-                        status = "🟢" if printer['state'] == 'online' else "🔴"
-                        print(f"   {status} ID: {printer['id']} | Name: {printer['name']} | State: {printer['state']}")
-                    else:
-                        # If it's a tuple or list, access by index
-                        state = printer[2] if len(printer) > 2 else 'unknown'
-                        status = "🟢" if state == 'online' else "🔴"
-                        name = printer[1] if len(printer) > 1 else 'Unknown'
-                        printer_id = printer[0] if len(printer) > 0 else 'Unknown'
-                        print(f"   {status} ID: {printer_id} | Name: {name} | State: {state}")
-        else:
+                    status = "🟢" if printer['state'] == 'online' else "🔴"
+                    print(f"   {status} ID: {printer['id']} | Name: {printer['name']} | State: {printer['state']}")
+        elif printer_info:
             # Single printer configured
-            if printer_info:
-                if isinstance(printer_info, dict):
-                    status = "🟢" if printer_info['state'] == 'online' else "🔴"
-                    print(f"   {status} Configured printer: {printer_info['name']} (State: {printer_info['state']})")
-                else:
-                    state = printer_info[2] if len(printer_info) > 2 else 'unknown'
-                    status = "🟢" if state == 'online' else "🔴"
-                    name = printer_info[1] if len(printer_info) > 1 else 'Unknown'
-                    print(f"   {status} Configured printer: {name} (State: {state})")
+            status = "🟢" if printer_info['state'] == 'online' else "🔴"
+            print(f"   {status} Configured printer: {printer_info['name']} (State: {printer_info['state']})")
         
         return True
         
@@ -118,21 +136,57 @@ def test_printnode_connection():
         print(f"❌ PrintNode connection failed: {str(e)}")
         return False
 
-def run_health_check():
+class _PerThreadOutput:
+    """sys.stdout stand-in that keeps what each health check thread prints apart"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+    
+    def write(self, text):
+        buffer = self.buffers.get(threading.get_ident())
+        return (self.stream if buffer is None else buffer).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+def _run_captured(output, check_func):
+    """Run a check, returning its result and everything it printed"""
+    buffer = output.buffers[threading.get_ident()] = io.StringIO()
+    try:
+        return check_func(), buffer.getvalue()
+    finally:
+        del output.buffers[threading.get_ident()]
+
+def run_health_check(quick=False, timeout=PRINTNODE_TIMEOUT):
     """Run a complete health check of the system"""
     print("🏥 Running Label Automation System Health Check\n")
     
+    # Loads .env, which the connection checks rely on
+    print("\n--- Environment Variables ---")
+    all_passed = check_environment()
+    
     checks = [
-        ("Environment Variables", check_environment),
         ("EasyPost Connection", test_easypost_connection),
-        ("PrintNode Connection", test_printnode_connection)
+        ("PrintNode Connection", lambda: test_printnode_connection(quick, timeout))
     ]
     
-    all_passed = True
+    # The connection checks are independent network round-trips, so they run
+    # at the same time; each one's output is printed once both are done
+    output = _PerThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = [(check_name, executor.submit(_run_captured, output, check_func))
+                       for check_name, check_func in checks]
+            results = [(check_name, future.result()) for check_name, future in futures]
+    finally:
+        sys.stdout = output.stream
     
-    for check_name, check_func in checks:
+    for check_name, (passed, printed) in results:
         print(f"\n--- {check_name} ---")
-        if not check_func():
+        print(printed, end='')
+        if not passed:
             all_passed = False
     
     print("\n" + "="*50)
@@ -150,7 +204,7 @@ def show_usage():
 Label Automation System Setup
 
 Usage:
-    python setup.py [command]
+    python setup.py [command] [--quick] [--timeout SECONDS]
 
 Commands:
     health      Run health check on all system components
@@ -159,27 +213,38 @@ Commands:
     env         Check environment variables only
     help        Show this help message
 
+Options:
+    --quick     Only check the PrintNode API key, without listing printers
+    --timeout   Seconds to wait for PrintNode (default: 10)
+
 Examples:
     python setup.py health     # Run full health check
     python setup.py printnode  # Test just PrintNode connection
+    python setup.py printnode --quick --timeout 5
 """)
 
 def main():
     """Main setup function"""
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('command', nargs='?')
+    parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--timeout', type=float, default=PRINTNODE_TIMEOUT)
+    args, _ = parser.parse_known_args()
+    
+    if not args.command:
         show_usage()
         return
     
-    command = sys.argv[1].lower()
+    command = args.command.lower()
     
     if command == "health":
-        run_health_check()
+        run_health_check(quick=args.quick, timeout=args.timeout)
     elif command == "easypost":
         check_environment()
         test_easypost_connection()
     elif command == "printnode":
         check_environment()
-        test_printnode_connection()
+        test_printnode_connection(quick=args.quick, timeout=args.timeout)
     elif command == "env":
         check_environment()
     elif command == "help":
@@ -2,107 +2,157 @@
 """
 Test script for PNG to PDF conversion functionality
 
-This script tests the convert_label.py module with a sample image
+This script tests the app.converter.png_pdf module with a sample image
 to ensure it works correctly for PrintNode compatibility.
 """
 
+import functools
+import io
+import logging
 import os
 import sys
+import tempfile
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont
 
 # Add current directory to Python path
 sys.path.append(str(Path(__file__).parent))
 
-from convert_label import convert_png_to_pdf, LabelConversionError
+from app.converter.png_pdf import convert_png_to_pdf, convert_image_bytes_to_pdf, convert_folder, LabelConversionError
+from app.converter.png_pdf import main as cli_main
 
-def create_sample_label(output_path="test_label.png"):
+@functools.lru_cache(maxsize=1)
+def _default_font():
+    """PIL's default font, loaded once and shared by every sample label"""
+    return ImageFont.load_default()
+
+def create_sample_label(output_path="test_label.png", width=400, height=600, dpi=150):
     """
     Create a sample shipping label PNG for testing
     
+    The default 400x600 image at 150 DPI is enough to exercise conversion;
+    pass 1200x1800 at 300 DPI for a full-resolution 4x6 label.
+    
     Args:
-        output_path (str): Path where to save the sample label
+        output_path (str): Path where to save the sample label, or None to keep it in memory
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+        dpi (int): Resolution recorded in the PNG
         
     Returns:
-        str: Path to created sample label
+        str or BytesIO: Path to created sample label, or the PNG buffer if output_path is None
     """
-    # Create a 4x6 inch image at 300 DPI (1200x1800 pixels)
-    width, height = 1200, 1800
+    # Layout is designed for 1200x1800 and scaled to the requested size
+    scale = width / 1200
+    
+    def at(value):
+        return round(value * scale)
+    
     image = Image.new('RGB', (width, height), 'white')
     draw = ImageDraw.Draw(image)
     
     # Draw a border
     border_color = 'black'
-    border_width = 10
+    border_width = max(1, at(10))
     draw.rectangle([0, 0, width-1, height-1], outline=border_color, width=border_width)
     
-    # Try to use a default font, fall back to basic if not available
-    try:
-        # Try to load a font (size 60 for title, 40 for text)
-        title_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
-    except:
-        title_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
+    # Use PIL's built-in font
+    title_font = text_font = _default_font()
     
     # Add sample shipping label content
     y_pos = 50
     
     # Title
-    draw.text((50, y_pos), "SHIPPING LABEL", fill='black', font=title_font)
+    draw.text((at(50), at(y_pos)), "SHIPPING LABEL", fill='black', font=title_font)
     y_pos += 100
     
     # From address
-    draw.text((50, y_pos), "FROM:", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "FROM:", fill='black', font=text_font)
     y_pos += 50
-    draw.text((50, y_pos), "Premium AI Solutions", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "Premium AI Solutions", fill='black', font=text_font)
     y_pos += 40
-    draw.text((50, y_pos), "123 Tech Street", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "123 Tech Street", fill='black', font=text_font)
     y_pos += 40
-    draw.text((50, y_pos), "San Francisco, CA 94105", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "San Francisco, CA 94105", fill='black', font=text_font)
     y_pos += 80
     
     # To address
-    draw.text((50, y_pos), "TO:", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "TO:", fill='black', font=text_font)
     y_pos += 50
-    draw.text((50, y_pos), "Test Customer", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "Test Customer", fill='black', font=text_font)
     y_pos += 40
-    draw.text((50, y_pos), "456 Customer Ave", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "456 Customer Ave", fill='black', font=text_font)
     y_pos += 40
-    draw.text((50, y_pos), "Los Angeles, CA 90210", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "Los Angeles, CA 90210", fill='black', font=text_font)
     y_pos += 80
     
     # Tracking number
-    draw.text((50, y_pos), "TRACKING: EZ1234567890", fill='black', font=title_font)
+    draw.text((at(50), at(y_pos)), "TRACKING: EZ1234567890", fill='black', font=title_font)
     y_pos += 100
     
     # Barcode placeholder (simple lines)
     for i in range(0, 500, 10):
         line_width = 2 if i % 20 == 0 else 1
-        draw.line([50 + i, y_pos, 50 + i, y_pos + 80], fill='black', width=line_width)
+        draw.line([at(50 + i), at(y_pos), at(50 + i), at(y_pos + 80)], fill='black', width=line_width)
     y_pos += 120
     
     # Service type
-    draw.text((50, y_pos), "PRIORITY MAIL", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "PRIORITY MAIL", fill='black', font=text_font)
     y_pos += 50
-    draw.text((50, y_pos), "1-3 Business Days", fill='black', font=text_font)
+    draw.text((at(50), at(y_pos)), "1-3 Business Days", fill='black', font=text_font)
     
     # Save the image
-    image.save(output_path, 'PNG', dpi=(300, 300))
+    if output_path is None:
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', dpi=(dpi, dpi))
+        buffer.seek(0)
+        print(f"Created in-memory sample label ({width}x{height} pixels)")
+        return buffer
+    
+    image.save(output_path, 'PNG', dpi=(dpi, dpi))
     print(f"Created sample label: {output_path} ({width}x{height} pixels)")
     return output_path
 
-def test_conversion():
-    """Test the PNG to PDF conversion functionality"""
+def test_conversion(full=False, e2e=False):
+    """
+    Test the PNG to PDF conversion functionality
+    
+    Args:
+        full (bool): Use full-size 300 DPI labels
+        e2e (bool): Test the CLI by running convert_label.py in a subprocess
+            rather than calling its entry point in this interpreter
+    """
     print("=" * 50)
     print("Testing PNG to PDF Conversion")
     print("=" * 50)
     
+    label_size = {'width': 1200, 'height': 1800, 'dpi': 300} if full else {}
+    
+    # Test in-memory conversion
+    try:
+        print("\nConverting in-memory sample label")
+        pdf_content = convert_image_bytes_to_pdf(create_sample_label(None, **label_size))
+        if pdf_content[:4] == b'%PDF':
+            print(f"✅ In-memory conversion successful: {len(pdf_content):,} bytes")
+        else:
+            print("❌ In-memory conversion did not produce a valid PDF header")
+    except LabelConversionError as e:
+        print(f"❌ In-memory conversion error: {e}")
+    
+    # Test files live in a temporary directory that is removed afterwards
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _test_file_conversion(temp_dir, label_size, e2e)
+    
+    print("\n" + "="*50)
+    print("Test Complete!")
+
+def _test_file_conversion(temp_dir, label_size, e2e):
+    """Test file and CLI conversion with sample labels in temp_dir"""
     # Create sample label
-    sample_png = create_sample_label("test_label.png")
+    sample_png = create_sample_label(os.path.join(temp_dir, "test_label.png"), **label_size)
     
     # Test single file conversion
-    output_pdf = "test_label.pdf"
+    output_pdf = os.path.join(temp_dir, "test_label.pdf")
     
     try:
         print(f"\nConverting {sample_png} -> {output_pdf}")
@@ -139,15 +189,42 @@ def test_conversion():
     print("="*50)
     
     # Create another sample for CLI test
-    cli_sample = create_sample_label("cli_test_label.png")
-    cli_output = "cli_test_output.pdf"
+    cli_sample = create_sample_label(os.path.join(temp_dir, "cli_test_label.png"), **label_size)
+    cli_output = os.path.join(temp_dir, "cli_test_output.pdf")
+    
+    if e2e:
+        _test_cli_subprocess(cli_sample, cli_output)
+    else:
+        _test_cli_in_process(cli_sample, cli_output)
+
+def _test_cli_in_process(cli_sample, cli_output):
+    """Run the CLI entry point in this interpreter"""
+    print(f"\nTesting CLI: convert_label.main([{cli_sample!r}, {cli_output!r}, '--verbose'])")
+    # --verbose changes the root log level, so it is put back afterwards
+    root_logger = logging.getLogger()
+    log_level = root_logger.level
+    try:
+        returncode = cli_main([cli_sample, cli_output, "--verbose"])
+    except SystemExit as e:
+        returncode = e.code
+    except Exception as e:
+        print(f"❌ CLI test error: {e}")
+        return
+    finally:
+        root_logger.setLevel(log_level)
     
-    # Test CLI command
+    if returncode == 0 and os.path.exists(cli_output):
+        print("✅ CLI conversion successful!")
+    else:
+        print(f"❌ CLI conversion failed (exit code: {returncode})")
+
+def _test_cli_subprocess(cli_sample, cli_output):
+    """Run convert_label.py in a separate interpreter, end to end"""
     import subprocess
     try:
         print(f"\nTesting CLI: python convert_label.py {cli_sample} {cli_output}")
         result = subprocess.run([
-            sys.executable, "convert_label.py", 
+            sys.executable, str(Path(__file__).parent / "convert_label.py"), 
             cli_sample, cli_output, "--verbose"
         ], capture_output=True, text=True, timeout=30)
         
@@ -169,24 +246,46 @@ def test_conversion():
         print("❌ CLI test timed out")
     except Exception as e:
         print(f"❌ CLI test error: {e}")
-    
-    # Clean up test files
-    print(f"\n" + "="*50)
-    print("Cleaning Up Test Files")
-    print("="*50)
-    
-    test_files = [sample_png, output_pdf, cli_sample, cli_output]
-    for file_path in test_files:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"🗑️ Removed: {file_path}")
-        except Exception as e:
-            print(f"⚠️ Failed to remove {file_path}: {e}")
-    
-    print("\n" + "="*50)
-    print("Test Complete!")
-    print("="*50)
+
+def test_truncated_images_are_rejected():
+    """Damaged PNG/JPG files raise LabelConversionError instead of producing a broken PDF"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for suffix, image_format in (('.png', 'PNG'), ('.jpg', 'JPEG')):
+            buffer = io.BytesIO()
+            Image.new('L', (400, 600), 'white').save(buffer, image_format)
+            truncated = os.path.join(temp_dir, f"truncated{suffix}")
+            with open(truncated, 'wb') as f:
+                f.write(buffer.getvalue()[:len(buffer.getvalue()) // 2])
+            
+            try:
+                convert_png_to_pdf(truncated, os.path.join(temp_dir, f"truncated{suffix}.pdf"))
+            except LabelConversionError:
+                pass
+            else:
+                raise AssertionError(f"Truncated {image_format} was converted")
+
+def test_jpeg_with_trailing_bytes_is_converted():
+    """A JPEG with data after its end-of-image marker still converts to a PDF"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        buffer = io.BytesIO()
+        Image.new('L', (400, 600), 'white').save(buffer, 'JPEG')
+        padded = os.path.join(temp_dir, "padded.jpg")
+        with open(padded, 'wb') as f:
+            f.write(buffer.getvalue() + b'\x00' * 64 + b'trailing data')
+        
+        output = os.path.join(temp_dir, "padded.pdf")
+        assert convert_png_to_pdf(padded, output)
+        with open(output, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+
+def test_folder_images_with_the_same_name_are_converted_once():
+    """label.png and label.jpg would both write label.pdf, so only the first is converted"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, image_format in (('label.png', 'PNG'), ('label.jpg', 'JPEG'), ('other.png', 'PNG')):
+            Image.new('L', (400, 600), 'white').save(os.path.join(temp_dir, name), image_format)
+        
+        converted = convert_folder(temp_dir, workers=1)
+        assert sorted(os.path.basename(path) for path in converted) == ['label.pdf', 'other.pdf']
 
 if __name__ == '__main__':
-    test_conversion() 
\ No newline at end of file
+    test_conversion(full='--full' in sys.argv[1:], e2e='--e2e' in sys.argv[1:]) 
\ No newline at end of file
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for how EasyPost and label download HTTP errors are surfaced
+
+A local HTTP server stands in for EasyPost, answering every request with a 500.
+"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import pytest
+from easypost.errors import InternalServerError
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.easypost.multi_client import new_easypost_client
+from app.utils.http import create_session
+
+class _FailingHandler(BaseHTTPRequestHandler):
+    """Answer every request with a JSON 500 error, counting requests per method"""
+
+    hits = {}
+
+    def _fail(self):
+        _FailingHandler.hits[self.command] = _FailingHandler.hits.get(self.command, 0) + 1
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        body = b'{"error": {"code": "INTERNAL_SERVER_ERROR", "message": "Something went wrong"}}'
+        self.send_response(500)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _fail
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def failing_server():
+    """Base URL of a local server that fails every request"""
+    _FailingHandler.hits = {}
+    server = HTTPServer(('127.0.0.1', 0), _FailingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+def test_easypost_500_raises_sdk_error(failing_server):
+    """An EasyPost 500 reaches callers as the SDK's typed API error"""
+    client = new_easypost_client("EZTK_test")
+    client.api_base = f"{failing_server}/v2"
+    with pytest.raises(InternalServerError):
+        client.shipment.retrieve("shp_test")
+
+def test_shared_session_returns_last_error_response(failing_server):
+    """Retries that run out return the last response instead of raising RetryError"""
+    session = create_session(retries=2, backoff_factor=0)
+    session.mount('http://', session.get_adapter('https://'))
+
+    response = session.get(f"{failing_server}/label.pdf", timeout=5)
+    assert response.status_code == 500
+    assert _FailingHandler.hits['GET'] == 3
+
+def test_shared_session_does_not_retry_post(failing_server):
+    """A POST that got a 5xx is not repeated"""
+    session = create_session(retries=2, backoff_factor=0)
+    session.mount('http://', session.get_adapter('https://'))
+
+    response = session.post(f"{failing_server}/shipments", json={}, timeout=5)
+    assert response.status_code == 500
+    assert _FailingHandler.hits['POST'] == 1
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for management API payload validation
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import Config
+from app.main import create_app
+from app.management.api import (
+    CREATE_ACCOUNT_SCHEMA,
+    CREATE_PRINTER_SCHEMA,
+    UPDATE_ACCOUNT_SCHEMA,
+    parse_payload,
+)
+
+PRINTER = {'printer_name': "Warehouse", 'printnode_api_key': "pn_key", 'printer_id': 12345}
+
+def test_flags_accept_booleans_and_zero_one():
+    """On/off fields take true/false or 1/0, always stored as booleans"""
+    for value, expected in ((True, True), (False, False), (1, True), (0, False)):
+        fields, error = parse_payload({'name': "Shop", 'api_key': "EZ", 'is_active': value},
+                                      CREATE_ACCOUNT_SCHEMA)
+        assert error is None
+        assert fields['is_active'] is expected
+
+    for value in (2, -1, "yes", 1.0):
+        _, error = parse_payload({**PRINTER, 'is_default': value}, CREATE_PRINTER_SCHEMA)
+        assert error == "Invalid type for field: is_default"
+
+def test_printer_id_rejects_booleans():
+    """printer_id takes an int or str, but not true/false"""
+    for value in (12345, "12345"):
+        fields, error = parse_payload({**PRINTER, 'printer_id': value}, CREATE_PRINTER_SCHEMA)
+        assert error is None
+        assert fields['printer_id'] == value
+
+    for value in (True, False):
+        _, error = parse_payload({**PRINTER, 'printer_id': value}, CREATE_PRINTER_SCHEMA)
+        assert error == "Invalid type for field: printer_id"
+
+def test_partial_update_returns_only_given_fields():
+    """Updates validate and return just the fields in the request"""
+    fields, error = parse_payload({'is_active': 0}, UPDATE_ACCOUNT_SCHEMA, partial=True)
+    assert error is None
+    assert fields == {'is_active': False}
+
+    _, error = parse_payload({'api_key': 42}, UPDATE_ACCOUNT_SCHEMA, partial=True)
+    assert error == "Invalid type for field: api_key"
+
+    _, error = parse_payload({'id': "new-id", 'name': None}, UPDATE_ACCOUNT_SCHEMA, partial=True)
+    assert error == "Missing required fields: name"
+
+def test_each_app_checks_its_own_api_key():
+    """Apps created with different MANAGEMENT_API_KEYs each accept only their own key"""
+    apps = {}
+    for key in ("first-key", "second-key"):
+        config = type('TestConfig', (Config,), {'MANAGEMENT_API_KEY': key})
+        apps[key] = create_app(config).test_client()
+
+    for key, client in apps.items():
+        for sent in apps:
+            # An empty update is refused with 400 once past the key check, before any database access
+            status = client.put('/manage/accounts/acct1', headers={'X-API-Key': sent}).status_code
+            assert status == (400 if sent == key else 401)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for submitting labels to PrintNode
+
+PrintNode itself is replaced by a fake Gateway that records print jobs.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import Config
+from app.converter.label_converter import convert_label_if_needed
+from app.printnode import batch
+from app.printnode.jobs import print_job
+
+class FakeGateway:
+    """Stand-in for the PrintNode Gateway that records PrintJob calls"""
+
+    def __init__(self, error=None):
+        self.jobs = []
+        self.error = error
+
+    def PrintJob(self, **job):
+        self.jobs.append(job)
+        if self.error is not None:
+            raise self.error
+        return len(self.jobs)
+
+def test_accepted_png_is_sent_raw():
+    """A PNG the printer accepts skips conversion and reaches PrintNode as a raw job"""
+    png = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+    label_data, content = convert_label_if_needed({'label_file_type': 'PNG'}, png, accepted_formats={'png'})
+    assert label_data['label_file_type'] == 'PNG'
+    assert bytes(content) == png
+
+    client = FakeGateway()
+    print_job(client, 123, 'png', "Shipping Label", content)
+    assert client.jobs[0]['job_type'] == 'raw'
+
+def test_pdf_and_printer_languages_job_types():
+    """PDFs are sent as PDF jobs, ZPL/EPL and unknown formats as raw jobs"""
+    client = FakeGateway()
+    for file_type in ('pdf', 'zpl', 'epl', 'bmp'):
+        print_job(client, 123, file_type, "Shipping Label", b'label')
+    assert [job['job_type'] for job in client.jobs] == ['pdf', 'raw', 'raw', 'raw']
+
+def test_failed_batch_counts_one_breaker_failure(monkeypatch):
+    """A failed job carrying several labels counts as one failure, not one per label"""
+    monkeypatch.setattr(Config, 'PRINT_BATCH_WINDOW', 0.2)
+    client = FakeGateway(error=RuntimeError("PrintNode unavailable"))
+    errors = []
+
+    def submit(i):
+        try:
+            batch.submit_print_job(client, 'key', 4242, 'zpl', f"Label {i}", b'^XA^XZ')
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(client.jobs) == 1
+    assert len(errors) == 3
+    assert batch.printer_breaker.allow('4242')
+    assert batch.printer_breaker._failures['4242'] == 1
+    batch.printer_breaker.record_success('4242')
+
+def test_printer_submissions_are_first_come_first_served():
+    """Jobs for one printer are sent in the order they were submitted"""
+    sent = []
+
+    class SlowGateway(FakeGateway):
+        def PrintJob(self, **job):
+            time.sleep(0.01)
+            sent.append(job['title'])
+            return super().PrintJob(**job)
+
+    client = SlowGateway()
+    threads = []
+    for i in range(8):
+        thread = threading.Thread(target=batch.submit_print_job,
+                                  args=(client, 'key', 77, 'png', f"Label {i}", b'label'))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+
+    assert sent == [f"Label {i}" for i in range(8)]
+    assert ('key', 77) not in batch._printer_queues
+
+def test_blocked_printer_does_not_hold_up_other_printers(monkeypatch):
+    """Jobs queued behind a hung printer give up, and other printers keep printing"""
+    monkeypatch.setattr(Config, 'PRINTER_WAIT_TIMEOUT', 0.2)
+    release = threading.Event()
+
+    class HungGateway(FakeGateway):
+        def PrintJob(self, **job):
+            release.wait(5)
+            return super().PrintJob(**job)
+
+    hung = HungGateway()
+    first = threading.Thread(target=batch.submit_print_job,
+                             args=(hung, 'key', 'A', 'png', "Label 1", b'label'))
+    first.start()
+    time.sleep(0.05)
+
+    try:
+        started = time.monotonic()
+        response, _ = batch.submit_print_job(FakeGateway(), 'key', 'B', 'png', "Label 2", b'label')
+        assert response == 1
+        assert time.monotonic() - started < 0.1
+
+        try:
+            batch.submit_print_job(hung, 'key', 'A', 'png', "Label 3", b'label')
+        except TimeoutError:
+            pass
+        else:
+            raise AssertionError("Job queued behind a hung printer was sent")
+        assert len(batch._printer_queues[('key', 'A')]) == 1
+    finally:
+        release.set()
+        first.join()
+
+    assert len(hung.jobs) == 1
+    assert ('key', 'A') not in batch._printer_queues
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for tracker.created event handling
+
+EasyPost and PrintNode are replaced by fakes, so no API keys are needed.
+"""
+
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import Config
+from app.handlers import tracker_handler
+
+def _fake_easypost_client(delay):
+    """EasyPost client stand-in whose shipment lookup takes delay seconds"""
+    label = SimpleNamespace(label_url="https://example.com/label.pdf", label_file_type="PDF",
+                            created_at="2025-01-01T00:00:00Z")
+
+    def all_shipments(**params):
+        time.sleep(delay)
+        return SimpleNamespace(shipments=[SimpleNamespace(id="shp_test", postage_label=label)])
+
+    return SimpleNamespace(shipment=SimpleNamespace(all=all_shipments))
+
+def test_concurrent_redeliveries_print_once(monkeypatch):
+    """Two deliveries of the same event processed at the same time print one label"""
+    printed = []
+    monkeypatch.setattr(Config, 'PRINTNODE_API_KEY', 'test-key')
+    monkeypatch.setattr(tracker_handler, 'get_easypost_client', lambda: _fake_easypost_client(0.1))
+    monkeypatch.setattr(tracker_handler, 'download_label_content',
+                        lambda url, sink: io.BytesIO(b'%PDF-1.4 test label'))
+    monkeypatch.setattr(tracker_handler, 'send_to_printnode',
+                        lambda label_data, content: printed.append(label_data) or {"success": True})
+    tracker_handler._SEEN_TRACKERS.clear()
+
+    event = {"description": "tracker.created",
+             "result": {"id": "trk_concurrent", "tracking_code": "EZ1000000001"}}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tracker_handler.handle_tracker_event(event)))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(printed) == 1
+    assert sorted(bool(result.get('deduped')) for result in results) == [False, True]
+
+def test_failed_print_releases_tracker(monkeypatch):
+    """A label whose print job failed is printed again when the event is redelivered"""
+    attempts = []
+    monkeypatch.setattr(Config, 'PRINTNODE_API_KEY', 'test-key')
+    monkeypatch.setattr(tracker_handler, 'get_easypost_client', lambda: _fake_easypost_client(0))
+    monkeypatch.setattr(tracker_handler, 'download_label_content',
+                        lambda url, sink: io.BytesIO(b'%PDF-1.4 test label'))
+    monkeypatch.setattr(tracker_handler, 'send_to_printnode',
+                        lambda label_data, content: attempts.append(label_data) or {"success": len(attempts) > 1})
+    tracker_handler._SEEN_TRACKERS.clear()
+
+    event = {"description": "tracker.created",
+             "result": {"id": "trk_reprint", "tracking_code": "EZ1000000002"}}
+    assert not tracker_handler.handle_tracker_event(event)['print_job']['success']
+    assert tracker_handler.handle_tracker_event(event)['print_job']['success']
+    assert tracker_handler.handle_tracker_event(event).get('deduped')
+    assert len(attempts) == 2
+
+def test_failed_lookup_releases_tracker(monkeypatch):
+    """An event that fails before printing can be retried by a redelivery"""
+    def failing_client():
+        raise RuntimeError("EasyPost unavailable")
+
+    monkeypatch.setattr(tracker_handler, 'get_easypost_client', failing_client)
+    tracker_handler._SEEN_TRACKERS.clear()
+
+    event = {"description": "tracker.created", "result": {"id": "trk_retry"}}
+    assert not tracker_handler.handle_tracker_event(event)['success']
+    assert not tracker_handler.handle_tracker_event(event).get('deduped')
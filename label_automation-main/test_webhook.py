@@ -3,10 +3,27 @@
 Test script for Label Automation System webhook functionality
 """
 
+import argparse
+import copy
 import json
 import requests
-import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Shared session so repeated requests reuse the connection to the server
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                                     max_retries=Retry(total=2, backoff_factor=0.1)))
+SESSION.mount("https://", SESSION.get_adapter("http://"))
 
 def create_test_webhook_payload():
     """Create a test webhook payload similar to what EasyPost sends"""
@@ -33,13 +50,22 @@ def create_test_webhook_payload():
         }
     }
 
-def send_test_webhook(base_url="http://localhost:5000", endpoint="/webhook/easypost"):
-    """Send a test webhook to the local server"""
+def encode_payload(payload):
+    """Serialize a webhook payload to the JSON request body, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def send_test_webhook(base_url="http://localhost:5000", endpoint="/webhook/easypost", pretty=False):
+    """Send a test webhook to the local server, printing JSON indented if pretty"""
     url = f"{base_url}{endpoint}"
     payload = create_test_webhook_payload()
     
     print(f"🚀 Sending test webhook to: {url}")
-    print(f"📦 Payload: {json.dumps(payload, indent=2)}")
+    if pretty:
+        print(f"📦 Payload: {json.dumps(payload, indent=2)}")
+    else:
+        print(f"📦 Payload: {json.dumps(payload, separators=(',', ':'))}")
     
     try:
         headers = {
@@ -47,18 +73,22 @@ def send_test_webhook(base_url="http://localhost:5000", endpoint="/webhook/easyp
             'User-Agent': 'EasyPost/Webhook-Test'
         }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = SESSION.post(url, data=encode_payload(payload), headers=headers, timeout=30)
         
         print(f"\n📡 Response Status: {response.status_code}")
         print(f"📡 Response Headers: {dict(response.headers)}")
         
-        try:
-            response_json = response.json()
-            print(f"📡 Response Body: {json.dumps(response_json, indent=2)}")
-        except:
-            print(f"📡 Response Body: {response.text}")
+        if pretty:
+            try:
+                response_json = response.json()
+                print(f"📡 Response Body: {json.dumps(response_json, indent=2)}")
+            except ValueError:
+                print(f"📡 Response Body: {response.text}")
+        else:
+            # The body as sent, cut short rather than parsed and re-encoded
+            print(f"📡 Response Body: {response.text[:512]}")
         
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             print("✅ Test webhook sent successfully!")
         else:
             print(f"❌ Webhook failed with status {response.status_code}")
@@ -69,6 +99,48 @@ def send_test_webhook(base_url="http://localhost:5000", endpoint="/webhook/easyp
     except Exception as e:
         print(f"❌ Error sending webhook: {str(e)}")
 
+def send_webhook_burst(base_url="http://localhost:5000", count=100, concurrency=10, endpoint="/webhook/easypost"):
+    """Send count test webhooks from concurrency threads and report latencies"""
+    url = f"{base_url}{endpoint}"
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'EasyPost/Webhook-Test'
+    }
+    
+    # Distinct event and tracker IDs so the server doesn't dedupe the burst;
+    # bodies are encoded up front so serializing isn't part of the timings
+    template = create_test_webhook_payload()
+    bodies = []
+    for i in range(count):
+        payload = copy.deepcopy(template)
+        payload['id'] = f"evt_test_{i}"
+        payload['result']['id'] = f"trk_test_{i}"
+        bodies.append(encode_payload(payload))
+    
+    def send(body):
+        start = time.perf_counter()
+        try:
+            status = SESSION.post(url, data=body, headers=headers, timeout=30).status_code
+        except requests.exceptions.RequestException:
+            status = None
+        return status, time.perf_counter() - start
+    
+    print(f"🚀 Sending {count} test webhooks to {url} ({concurrency} at a time)")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, bodies))
+    elapsed = time.perf_counter() - started
+    
+    succeeded = sum(1 for status, _ in results if status in (200, 202))
+    latencies = sorted(latency for _, latency in results)
+    
+    def percentile(pct):
+        return latencies[min(len(latencies) - 1, round(pct / 100 * (len(latencies) - 1)))] * 1000
+    
+    print(f"📡 {succeeded}/{count} succeeded in {elapsed:.2f}s ({count / elapsed:.1f} requests/s)")
+    print(f"📡 Latency p50: {percentile(50):.1f} ms | p95: {percentile(95):.1f} ms | max: {latencies[-1] * 1000:.1f} ms")
+    return succeeded == count
+
 def test_health_endpoint(base_url="http://localhost:5000"):
     """Test the health endpoint"""
     url = f"{base_url}/health"
@@ -76,7 +148,7 @@ def test_health_endpoint(base_url="http://localhost:5000"):
     print(f"🏥 Testing health endpoint: {url}")
     
     try:
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         
         if response.status_code == 200:
             print("✅ Health endpoint is working!")
@@ -93,32 +165,42 @@ def test_health_endpoint(base_url="http://localhost:5000"):
     
     return True
 
+def positive_int(value):
+    """argparse type for integers of at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def main():
     """Main test function"""
-    if len(sys.argv) > 1 and sys.argv[1] in ["-h", "--help", "help"]:
-        print("""
-Label Automation Webhook Test Script
-
-Usage:
-    python test_webhook.py [base_url]
-
-Arguments:
-    base_url    Base URL of the server (default: http://localhost:5000)
-
+    parser = argparse.ArgumentParser(
+        description="Label Automation Webhook Test Script",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
 Examples:
     python test_webhook.py                          # Test local server
     python test_webhook.py http://localhost:8080    # Test custom port
     python test_webhook.py https://your-domain.com  # Test production server
+    python test_webhook.py --n 100                   # Send a burst of 100 webhooks
+    python test_webhook.py --pretty                 # Indent the JSON payload and response
 
 This script will:
 1. Test the health endpoint
 2. Send a test webhook payload to /webhook/easypost
-""")
-        return
+"""
+    )
+    parser.add_argument('base_url', nargs='?', default="http://localhost:5000",
+                        help='Base URL of the server (default: http://localhost:5000)')
+    parser.add_argument('--n', type=positive_int, default=1,
+                        help='Number of test webhooks to send (default: 1)')
+    parser.add_argument('--concurrency', type=positive_int, default=10,
+                        help='Webhooks in flight at once when sending more than one (default: 10)')
+    parser.add_argument('--pretty', action='store_true',
+                        help='Print the payload and response JSON indented')
+    args = parser.parse_args()
     
-    # Get base URL from command line or use default
-    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:5000"
-    base_url = base_url.rstrip('/')  # Remove trailing slash
+    base_url = args.base_url.rstrip('/')  # Remove trailing slash
     
     print("🧪 Label Automation System - Webhook Test")
     print(f"🎯 Target Server: {base_url}")
@@ -132,7 +214,10 @@ This script will:
     print("\n" + "=" * 50)
     
     # Send test webhook
-    send_test_webhook(base_url)
+    if args.n > 1:
+        send_webhook_burst(base_url, args.n, args.concurrency)
+    else:
+        send_test_webhook(base_url, pretty=args.pretty)
     
     print("\n" + "=" * 50)
     print("✅ Test completed!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for EasyPost webhook signature verification
+
+Requests go through the Flask test client; the account database is replaced
+by a fake, so no database file or running server is needed.
+"""
+
+import hashlib
+import hmac
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add current directory to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.config import Config
+from app.main import create_app
+from app.webhook import router
+
+BODY = json.dumps({"id": "evt_test", "description": "tracker.updated"}).encode('utf-8')
+
+class FakeAccountDatabase:
+    """Account database stand-in holding one account's webhook secret"""
+
+    def __init__(self, webhook_secret=None, error=None):
+        self.webhook_secret = webhook_secret
+        self.error = error
+
+    def get_easypost_account(self, account_id):
+        if self.error is not None:
+            raise self.error
+        return SimpleNamespace(account_id=account_id, webhook_secret=self.webhook_secret)
+
+def _sign(body, secret):
+    """X-Hmac-Signature header value EasyPost sends for body"""
+    return 'hmac-sha256-hex=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+def _post(path, signature=None):
+    """POST the test event to a webhook endpoint, signed if signature is given"""
+    headers = {'Content-Type': 'application/json'}
+    if signature is not None:
+        headers['X-Hmac-Signature'] = signature
+    return create_app().test_client().post(path, data=BODY, headers=headers)
+
+def test_account_webhook_signatures_are_enforced(monkeypatch):
+    """An account with a stored webhook secret only accepts requests signed with it"""
+    monkeypatch.setattr(router, 'get_account_database', lambda: FakeAccountDatabase('account-secret'))
+
+    assert _post('/webhook/easypost/acct1', _sign(BODY, 'account-secret')).status_code == 200
+    assert _post('/webhook/easypost/acct1').status_code == 401
+    assert _post('/webhook/easypost/acct1', _sign(BODY, 'other-secret')).status_code == 401
+
+def test_account_without_secret_is_not_verified(monkeypatch):
+    """Accounts with no stored webhook secret accept unsigned requests"""
+    monkeypatch.setattr(router, 'get_account_database', lambda: FakeAccountDatabase())
+    assert _post('/webhook/easypost/acct1').status_code == 200
+
+def test_legacy_webhook_uses_configured_secret(monkeypatch):
+    """The legacy endpoint is verified with EASYPOST_WEBHOOK_SECRET when it is set"""
+    monkeypatch.setattr(Config, 'EASYPOST_WEBHOOK_SECRET', 'legacy-secret')
+
+    assert _post('/webhook/easypost', _sign(BODY, 'legacy-secret')).status_code == 200
+    assert _post('/webhook/easypost').status_code == 401
+    assert _post('/webhook/easypost', _sign(BODY, 'account-secret')).status_code == 401
+
+def test_secret_lookup_error_returns_json_error(monkeypatch):
+    """A database error looking up the secret is answered with a JSON error, not an unhandled 500"""
+    monkeypatch.setattr(router, 'get_account_database',
+                        lambda: FakeAccountDatabase(error=RuntimeError("database is locked")))
+
+    response = _post('/webhook/easypost/acct1')
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'Could not verify webhook signature'